@@ -10,17 +10,36 @@ Supports:
 - Arrays with fixed or variable length
 - Nested structures
 - String types with encoding support
+
+Performance notes:
+- Large primitive arrays are memory-bound: each array is packed with one
+  Struct call and decoded through array.array, so cost scales with bytes.
+  When the format's endianness differs from the host's, decoding takes an
+  extra byteswap pass over the array.
+- Small mixed formats are bound by per-field Python overhead, which the
+  compiled programs and the generated reader keep to a minimum.
 """
 
+import ast
 import json
+import logging
+import codecs
 import struct
+import zlib
+import binascii
+import array
+import mmap
+import sys
 import os
-import io
 import crcmod
-from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Union, BinaryIO
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Union
+from dataclasses import dataclass, replace
+
 
+logger = logging.getLogger(__name__)
 
 
 class BinaryFormatError(Exception):
@@ -28,35 +47,64 @@ class BinaryFormatError(Exception):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class FieldDefinition:
     """Represents a field definition from the format specification."""
     name: str
     type: str
     size: int = None
     encoding: str = 'utf-8'
+    codec: Any = None  # codecs.CodecInfo for encodings without a str/bytes fast path
     length_field: str = None  # For variable-length arrays
+    length_code: Any = None  # length_field compiled once at parse time into a function of context
     fields: List['FieldDefinition'] = None  # For nested structures
     condition: str = None  # Condition for optional fields
+    condition_code: Any = None  # Condition compiled once at parse time into a function of (context, data)
     function: str = None  # Function to calculate field value (e.g., "crc32")
     function_scope: str = None  # Scope for function calculation
     function_scope_start: str = None  # Starting field for range scope
     function_scope_end: str = None  # Ending field for range scope
     function_parameters: Dict[str, Any] = None  # Parameters for the function
     discriminator_field:str = None
-    union_variants: Dict[str,List[Dict[str,Any]]] = None
+    union_variants: Dict[Union[int, str], List['FieldDefinition']] = None  # Keyed by decoded discriminator, see _variant_key
+    discriminator_path: tuple = None  # discriminator_field split into keys at parse time
+    columnar: bool = False  # Arrays of primitive structs as one list per struct field
+
+# Opcodes of the compiled field programs, see BinaryFormatHandler._compile_field
+OP_SCALAR = 0         # TYPE_MAP primitive; arg is its Struct
+OP_SCALAR_RUN = 1     # Adjacent plain primitives; arg is (run Struct, field names, original ops)
+OP_INT24 = 2          # arg is the int32 Struct the value widens to
+OP_UINT24 = 3         # arg is the uint32 Struct the value widens to
+OP_FIXED_STRING = 4   # arg is the padding Struct for the fixed size
+OP_VAR_STRING = 5
+OP_PRIM_ARRAY = 6     # Array of TYPE_MAP primitives; arg is the element Struct
+OP_ARRAY = 7          # Array of compound elements; arg is (element op, generated element reader, generated element writer)
+OP_RECORD_ARRAY = 8   # Array of fixed-layout structs; arg is (element op, record Struct, flat field names or None, nested layout or None)
+OP_STRUCT = 9         # arg is the compiled program of the struct's fields
+OP_UNION = 10         # arg is (discriminator type, its Struct or None, {variant key: (read op, write program)})
+OP_UNSUPPORTED = 11
+OP_FIXED_STRUCT = 12  # Struct of primitives and nested such structs; arg is (struct op, record Struct, layout)
+OP_INT24_ARRAY = 13   # Array of int24/uint24; arg is (element op, int32/uint32 Struct the values widen to)
+OP_COLUMN_ARRAY = 14  # Columnar array of flat primitive structs; arg is (element op, record Struct, field names)
+
 
 class ScopeResolver:
     """Resolves different types of scopes for calculated fields."""
     
+    # Scope types whose data does not depend on the calculated field's own offset
+    FIXED_SCOPES = frozenset(['entire_file', 'field_range', 'to_field', 'specific_bytes'])
+    
     def __init__(self, field_offsets: Dict[str, int], field_sizes: Dict[str, int]):
         self.field_offsets = field_offsets
         self.field_sizes = field_sizes
     
-    def get_scope_data(self, data: bytes, scope_type: str, 
+    def get_scope_data(self, data: Union[bytes, memoryview], scope_type: str, 
                       scope_start: str = None, scope_end: str = None,
-                      current_offset: int = 0) -> bytes:
-        """Get data based on scope definition."""
+                      current_offset: int = 0) -> Union[bytes, memoryview]:
+        """Get data based on scope definition.
+        
+        Given a memoryview, every scope is returned as a view without copying.
+        """
         
         if scope_type == "all_previous":
             return data[:current_offset]
@@ -161,7 +209,34 @@ class BinaryFormatHandler:
         'char': 'c'
     }
     
-    def __init__(self, format_source: Union[str, Dict[str, Any]]):
+    # Primitive arrays at least this long are decoded through array.array; below it a
+    # count-prefixed Struct is faster (measured crossover: 256-512 elements)
+    ARRAY_BULK_THRESHOLD = 256
+    # Canonical codec names that str.encode/bytes.decode handle natively
+    FAST_ENCODINGS = frozenset(['utf-8', 'ascii', 'iso8859-1', 'utf-16', 'utf-32'])
+    # Struct array elements packed per Struct call when writing fixed-layout records
+    RECORD_BATCH = 256
+    # Upper bound on cached array Structs, which are keyed by runtime lengths
+    PATH_CACHE_SIZE = 1024
+    # CRC functions keyed by (polynomial, initial_value, reverse, xor_out), shared by all handlers
+    _crc_funcs: Dict[tuple, Any] = {}
+    # Files at least this large are mmapped by deserialize_from_binary; smaller ones are read (measured crossover)
+    MMAP_MIN_SIZE = 256 * 1024
+    # deserialize_many only starts reader threads for at least this many files
+    PREFETCH_MIN_FILES = 4
+    # Builtins visible to condition and length_field expressions
+    EXPRESSION_BUILTINS = {'len': len, 'min': min, 'max': max, 'abs': abs, 'int': int, 'bool': bool}
+    # Syntax allowed in condition and length_field expressions
+    EXPRESSION_NODES = (
+        ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd, ast.Invert,
+        ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+        ast.LShift, ast.RShift, ast.BitAnd, ast.BitOr, ast.BitXor,
+        ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+        ast.IfExp, ast.Call, ast.Name, ast.Load, ast.Subscript, ast.Slice,
+        ast.Constant, ast.Tuple, ast.List,
+    )
+    
+    def __init__(self, format_source: Union[str, Dict[str, Any]], validate: bool = True):
         """
         Initialize the handler with a format definition.
         
@@ -170,14 +245,52 @@ class BinaryFormatHandler:
                 - Path to JSON file containing format definition
                 - JSON string containing format definition
                 - Dictionary containing format definition
+            validate: Check that array/struct/union values are lists/dicts before
+                serializing them. Pass False to skip these checks for trusted input.
         """
+        self.validate = validate
         self.format_json_dict = self._load_format_definition(format_source)
         self.endianness = self.format_json_dict.get('endianness', 'little')
         self.endian_char = '<' if self.endianness == 'little' else '>'
+        # 24-bit values read as their 4-byte word with the 4th byte zeroed, see _deserialize_field
+        self._int24_mask = 0xFFFFFF if self.endianness == 'little' else -256
+        # Precompiled packers, so the format string is parsed once per type
+        self._structs = {t: struct.Struct(self.endian_char + c) for t, c in self.TYPE_MAP.items()}
+        self._len_struct = struct.Struct(self.endian_char + 'I')
+        # Bulk array.array reads are in host order and need a byteswap pass only if it differs
+        self._need_swap = sys.byteorder != self.endianness
+        # array.array typecodes whose item size matches the standard struct size
+        self._array_codes = {t: c for t, c in self.TYPE_MAP.items()
+                             if c in array.typecodes and array.array(c).itemsize == self._structs[t].size}
+        # Globals of the functions compiled from condition and length_field expressions
+        self._eval_globals: Dict[str, Any] = {'__builtins__': self.EXPRESSION_BUILTINS}
+        # Parse the field tree once; every (de)serialize call reuses it
+        try:
+            self._fields: List[FieldDefinition] = [
+                self._parse_field_definition(field_def) for field_def in self.format_json_dict['fields']
+            ]
+        except KeyError as e:
+            raise BinaryFormatError(f"Invalid field definition, missing key: {e}")
+        # Count-prefixed Structs for primitive arrays, keyed by (element Struct, length)
+        self._batch_structs: Dict[tuple, struct.Struct] = {}
+        # Generated (reader, writer) pairs for struct array elements, keyed by id() of the element field
+        self._element_readers: Dict[int, Any] = {}
+        # Top-level ops stay unfused for two-phase serialization, which tracks per-field offsets;
+        # the fused program reads, and writes formats without calculated fields
+        self._program = self._compile(self._fields)
+        self._read_program = self._fuse(self._program)
+        self._has_calculated_fields = any(field.function for field in self._fields)
+        self._crc_tail = self._trailing_crc()
+        # (record Struct, layout) when the whole format is fixed-size primitives, else None
+        layout = self._fixed_layout(FieldDefinition(name='', type='struct', fields=self._fields))
+        self._record = (struct.Struct(self.endian_char + layout[0]), layout[1]) if layout is not None else None
+        self._record_writer = self._codegen_record_writer() if self._record is not None else None
+        self._reader = self._codegen_reader(self._read_program)
         self.calculated_fields: List[FieldDefinition] = []
         self.field_offsets: Dict[str, int] = {}
         self.field_sizes: Dict[str, int] = {}
-        self.scope_resolver = None
+        # Holds references to the offset/size dicts, which are cleared rather than replaced
+        self.scope_resolver = ScopeResolver(self.field_offsets, self.field_sizes)
     
     def _load_format_definition(self, format_source: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
         """Load and validate format definition from various sources."""
@@ -213,9 +326,10 @@ class BinaryFormatHandler:
     
     def _parse_field_definition(self, field_def: Dict[str, Any]) -> FieldDefinition:
         """Parse a field definition from the JSON format."""
+        # Interned names and types make the per-field dict probes identity hits
         field = FieldDefinition(
-            name=field_def['name'],
-            type=field_def['type'],
+            name=sys.intern(field_def['name']),
+            type=sys.intern(field_def['type']),
             size=field_def.get('size'),
             encoding=field_def.get('encoding', 'utf-8'),
             length_field=field_def.get('length_field'),
@@ -227,8 +341,30 @@ class BinaryFormatHandler:
             function_scope_end=field_def.get('function_scope_end'),
             function_parameters=field_def.get('function_parameters', {}),
             discriminator_field=field_def.get('discriminator_field'),
-            union_variants=field_def.get('union_variants', {})
+            union_variants=field_def.get('union_variants', {}),
+            columnar=field_def.get('columnar', False)
         )
+        # References to other fields are looked up by name, so share the interned form too
+        for attr in ('function_scope_start', 'function_scope_end', 'discriminator_field'):
+            ref = getattr(field, attr)
+            if isinstance(ref, str):
+                setattr(field, attr, sys.intern(ref))
+        if field.discriminator_field:
+            field.discriminator_path = tuple(
+                sys.intern(part.strip()) for part in field.discriminator_field.split('.') if part.strip())
+        if field.type == 'string':
+            try:
+                codec = codecs.lookup(field.encoding)
+            except LookupError as e:
+                raise BinaryFormatError(f"Invalid encoding for field {field.name}: {e}")
+            if codec.name not in self.FAST_ENCODINGS:
+                # str.encode/bytes.decode look these codecs up by name on every call
+                field.codec = codec
+        if isinstance(field.length_field, str):
+            field.length_code = self._compile_expression(field.length_field, 'length_field', field.name, ('context',))
+        if field.condition:
+            # Compile the condition expression once instead of re-parsing it on every eval
+            field.condition_code = self._compile_expression(field.condition, 'condition', field.name, ('context', 'data'))
         
         # Handle nested structures
         if field.type == 'struct' and 'fields' in field_def:
@@ -252,21 +388,613 @@ class BinaryFormatHandler:
         elif field.type == 'union':
             parsed_variants = {}
             for variant_key, variant_fields in field.union_variants.items():
-                parsed_variants[variant_key] = [self._parse_field_definition(f) for f in variant_fields]
+                parsed_variants[self._variant_key(variant_key)] = [self._parse_field_definition(f) for f in variant_fields]
+            field.union_variants = parsed_variants
         return field
     
+    def _trailing_crc(self):
+        """Return (field, fused program before it) for a lone trailing CRC over all previous bytes, else None."""
+        calculated = [field for field in self._fields if field.function]
+        if len(calculated) != 1 or calculated[0] is not self._fields[-1]:
+            return None
+        field = calculated[0]
+        params = field.function_parameters or {}
+        scope_type = params.get('function_scope') or params.get('scope') or field.function_scope or "all_previous"
+        if (field.function not in ("crc32", "crc16") or field.condition_code is not None
+                or scope_type not in ("all_previous", "from_start") or field.type not in self._structs):
+            return None
+        return field, self._fuse(self._program[:-1])
+    
+    def _variant_key(self, key: str) -> Union[int, str]:
+        """Return a union variant key as the int a discriminator decodes to, if it spells one."""
+        try:
+            number = int(key)
+        except (TypeError, ValueError):
+            return key
+        return number if str(number) == key else key
+    
+    def _compile(self, fields: List[FieldDefinition]) -> List[tuple]:
+        """Compile a list of parsed fields into a program of (opcode, field, arg) ops."""
+        return [self._compile_field(field) for field in fields]
+    
+    def _compile_expression(self, source: str, kind: str, field_name: str, params: tuple):
+        """Compile a condition or length_field expression into a function of `params`.
+        
+        The expression is checked against EXPRESSION_NODES first: only context/data
+        subscripts, arithmetic (no powers), comparisons and direct EXPRESSION_BUILTINS
+        calls are accepted. With no attribute access or method calls, a format file
+        cannot run arbitrary code or modify the data it is evaluated against; with no
+        `*` or `<<` between constants, it cannot spell out a huge string or number.
+        """
+        try:
+            tree = ast.parse(source, mode='eval')
+        except SyntaxError as e:
+            raise BinaryFormatError(f"Invalid {kind} for field {field_name}: {e}")
+        names = {'context', 'data'}.union(self.EXPRESSION_BUILTINS)
+        for node in ast.walk(tree):
+            if not isinstance(node, self.EXPRESSION_NODES):
+                problem = f"unsupported syntax {type(node).__name__}"
+            elif isinstance(node, ast.Name) and node.id not in names:
+                problem = f"unknown name '{node.id}'"
+            elif isinstance(node, ast.Call) and not (
+                    isinstance(node.func, ast.Name) and node.func.id in self.EXPRESSION_BUILTINS):
+                problem = "only calls to " + ", ".join(self.EXPRESSION_BUILTINS) + " are allowed"
+            elif (isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.LShift))
+                    and self._is_constant_expression(node.left) and self._is_constant_expression(node.right)):
+                # 'a'*10**11 or 1<<10**11 would build a huge value on first evaluation
+                problem = f"'{'*' if isinstance(node.op, ast.Mult) else '<<'}' between constants is not allowed, write the result instead"
+            else:
+                continue
+            raise BinaryFormatError(f"Invalid {kind} for field {field_name}: {problem}")
+        # A lambda is called much faster than eval() with a fresh scope dict
+        arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in params],
+                                  kwonlyargs=[], kw_defaults=[], defaults=[])
+        function = ast.fix_missing_locations(ast.Expression(ast.Lambda(args=arguments, body=tree.body)))
+        return eval(compile(function, f"<{kind} of {field_name}>", 'eval'), self._eval_globals)
+    
+    def _is_constant_expression(self, node: ast.AST) -> bool:
+        """Whether an expression node refers to neither context nor data."""
+        return not any(isinstance(n, ast.Name) and n.id in ('context', 'data') for n in ast.walk(node))
+    
+    def _compile_field(self, field: FieldDefinition) -> tuple:
+        """Compile a single parsed field into an (opcode, field, arg) op."""
+        if field.type in self.TYPE_MAP:
+            return (OP_SCALAR, field, self._structs[field.type])
+        elif field.type == 'int24':
+            return (OP_INT24, field, self._structs['int32'])
+        elif field.type == 'uint24':
+            return (OP_UINT24, field, self._structs['uint32'])
+        elif field.type == 'string':
+            if field.size:
+                if field.size < 0:
+                    raise BinaryFormatError(f"Invalid size for string field {field.name}: {field.size}")
+                # 's' truncates or NUL-pads to the fixed size in one call
+                return (OP_FIXED_STRING, field, struct.Struct(f"{field.size}s"))
+            return (OP_VAR_STRING, field, None)
+        elif field.type == 'array':
+            element_field = field.fields[0] if field.fields else None
+            if element_field is not None and element_field.type in self.TYPE_MAP:
+                return (OP_PRIM_ARRAY, field, self._structs[element_field.type])
+            element_op = self._compile_field(element_field) if element_field is not None else None
+            if element_op is not None and (element_op[0] == OP_INT24 or element_op[0] == OP_UINT24):
+                # 3-byte elements are widened to 4 in bulk and unpacked like a primitive array
+                return (OP_INT24_ARRAY, field, (element_op, element_op[2]))
+            layout = self._fixed_layout(element_field) if element_field is not None and element_field.type == 'struct' else None
+            if layout is not None:
+                # Fixed-layout record: every element is packed/unpacked with one Struct
+                record = struct.Struct(self.endian_char + layout[0])
+                if all(sub is None for _, sub in layout[1]):
+                    # Flat records map straight onto their field names
+                    names = tuple(name for name, _ in layout[1])
+                    if field.columnar:
+                        return (OP_COLUMN_ARRAY, field, (element_op, record, names))
+                    return (OP_RECORD_ARRAY, field, (element_op, record, names, None))
+                if not field.columnar:
+                    return (OP_RECORD_ARRAY, field, (element_op, record, None, layout[1]))
+            if field.columnar:
+                raise BinaryFormatError(f"Columnar array field {field.name} must have struct elements of plain primitive fields")
+            element_reader = element_writer = None
+            if element_op is not None and (element_op[0] == OP_STRUCT or element_op[0] == OP_UNION):
+                # Built once per element definition; union variants compile their fields twice
+                cached = self._element_readers.get(id(element_field))
+                if cached is None:
+                    if element_op[0] == OP_STRUCT:
+                        cached = (self._codegen_element_reader(element_op[2]),
+                                  self._codegen_element_writer(element_op[2]))
+                    else:
+                        cached = (self._union_element_reader(element_op), None)
+                    self._element_readers[id(element_field)] = cached
+                element_reader, element_writer = cached
+            return (OP_ARRAY, field, (element_op, element_reader, element_writer))
+        elif field.type == 'struct':
+            struct_op = (OP_STRUCT, field, self._fuse(self._compile(field.fields or [])))
+            layout = self._fixed_layout(field) if field.name != '#' else None
+            if layout is not None and any(sub is not None for _, sub in layout[1]):
+                # Nested fixed-layout structs: the whole subtree is one Struct call
+                record = struct.Struct(self.endian_char + layout[0])
+                return (OP_FIXED_STRUCT, field, (struct_op, record, layout[1]))
+            return struct_op
+        elif field.type == 'union':
+            # Variants are compiled once: a struct op for reading, a program for writing
+            variants = {}
+            for variant_key, variant_fields in field.union_variants.items():
+                read_op = self._compile_field(FieldDefinition(name=field.name, type='struct', fields=variant_fields))
+                variants[variant_key] = (read_op, self._fuse(self._compile(variant_fields)))
+            # The discriminator is the first field of every variant
+            first_variant = next(iter(field.union_variants.values()), None)
+            discriminator_type = first_variant[0].type if first_variant else None
+            discriminator_struct = self._structs.get(discriminator_type)
+            return (OP_UNION, field, (discriminator_type, discriminator_struct, variants))
+        return (OP_UNSUPPORTED, field, None)
+    
+    def _fixed_layout(self, field: FieldDefinition):
+        """Return (format codes, layout) if a struct holds only plain primitives and such structs.
+
+        The layout is a tuple of (name, sub-layout) pairs, with None for primitive leaves.
+        """
+        codes = []
+        layout = []
+        for f in field.fields or []:
+            if f.name == '#' or f.condition is not None or f.function or any(f.name == name for name, _ in layout):
+                return None
+            if f.type in self.TYPE_MAP:
+                codes.append(self.TYPE_MAP[f.type])
+                layout.append((f.name, None))
+            elif f.type == 'struct':
+                sub = self._fixed_layout(f)
+                if sub is None:
+                    return None
+                codes.append(sub[0])
+                layout.append((f.name, sub[1]))
+            else:
+                return None
+        if not layout:
+            return None
+        return ''.join(codes), tuple(layout)
+    
+    def _build_record(self, layout: tuple, values) -> Dict[str, Any]:
+        """Distribute an iterator of unpacked values into nested dicts following a layout."""
+        return {name: next(values) if sub is None else self._build_record(sub, values) for name, sub in layout}
+    
+    def _gather_record(self, layout: tuple, value: Dict[str, Any], values: List[Any]) -> None:
+        """Collect the leaf values of nested dicts in layout order."""
+        for name, sub in layout:
+            if name not in value:
+                raise BinaryFormatError(f"Missing field in data: {name}")
+            if sub is None:
+                values.append(value[name])
+            else:
+                if self.validate and not isinstance(value[name], dict):
+                    raise BinaryFormatError(f"Expected dict for struct field {name}")
+                self._gather_record(sub, value[name], values)
+    
+    def _fuse(self, program: List[tuple]) -> List[tuple]:
+        """Merge runs of adjacent plain scalar ops into single OP_SCALAR_RUN ops."""
+        fused = []
+        run = []
+        for op in program + [None]:
+            field = op[1] if op is not None else None
+            if (op is not None and op[0] == OP_SCALAR and field.name != '#'
+                    and field.condition is None and not field.function):
+                run.append(op)
+                continue
+            if len(run) > 1:
+                record = struct.Struct(self.endian_char + ''.join(o[2].format[-1] for o in run))
+                fused.append((OP_SCALAR_RUN, run[0][1], (record, tuple(o[1].name for o in run), run)))
+            else:
+                fused.extend(run)
+            run = []
+            if op is not None:
+                fused.append(op)
+        return fused
     
 
+    def _exec_generated(self, lines: List[str], filename: str, namespace: Dict[str, Any], name: str):
+        """Compile generated source lines into `namespace` and return the function `name` they define."""
+        try:
+            exec(compile('\n'.join(lines), filename, 'exec'), namespace)
+        except Exception as e:
+            raise BinaryFormatError(f"Could not generate {filename[1:-1]} for this format: {e}")
+        return namespace[name]
+    
+    def _codegen_reader(self, program: List[tuple]):
+        """Generate and compile a reader function specialized to the top-level program."""
+        namespace = self._reader_namespace()
+        if self._record is not None:
+            # Every field is a fixed-size primitive: one unpack and one dict display per record
+            namespace['record'], layout = self._record
+            namespace['program'] = program
+            lines = ['def read(buf):',
+                     '    if record.size > len(buf):',
+                     '        # Too short: read field by field, like the interpreter, for the same partial result and error',
+                     '        result = {}',
+                     '        read_fields(buf, 0, program, result, result)',
+                     '        return result',
+                     '    v = record.unpack_from(buf, 0)',
+                     f'    return {self._emit_layout(layout, 0)[0]}']
+            return self._exec_generated(lines, '<generated reader>', namespace, 'read')
+        lines = ['def read(buf):', '    result = {}', '    end = len(buf)', '    o = 0']
+        self._emit_reader(program, 'result', lines, namespace, set())
+        lines.append('    return result')
+        return self._exec_generated(lines, '<generated reader>', namespace, 'read')
+    
+    def _codegen_element_reader(self, program: List[tuple]):
+        """Generate a reader appending one struct array element to `items`; returns the new offset.
+        
+        Like the interpreter, the element is attached up front and dropped again
+        if nothing could be read into it.
+        """
+        namespace = self._reader_namespace()
+        lines = ['def read(buf, o, end, result, items):']
+        lines.extend(self._element_reader_body(program, namespace))
+        return self._exec_generated(lines, '<generated element reader>', namespace, 'read')
+    
+    def _element_reader_body(self, program: List[tuple], namespace: Dict[str, Any]) -> List[str]:
+        """Return the source lines reading one struct element into `items` and returning `o`."""
+        body = []
+        self._emit_reader(program, 'item', body, namespace, set())
+        lines = ['    item = {}', '    items.append(item)', '    try:']
+        lines.extend('    ' + line for line in body)
+        lines.extend(['    finally:', '        if not item:', '            items.pop()', '    return o'])
+        return lines
+    
+    def _codegen_element_writer(self, program: List[tuple]):
+        """Generate a writer serializing one struct array element into `out`.
+        
+        Unconditional scalars, runs, int24 and strings are inlined; every other op
+        goes through _serialize_fields, which applies conditions and placeholders.
+        """
+        namespace = {
+            'write_fields': self._serialize_fields,
+            'BinaryFormatError': BinaryFormatError,
+            'int32': self._structs['int32'],
+            'len_struct': self._len_struct,
+        }
+        
+        def const(value):
+            name = f"k{len(namespace)}"
+            namespace[name] = value
+            return name
+        
+        lines = ['def write(out, item, context):']
+        if self.validate:
+            lines.append("    if not isinstance(item, dict): raise BinaryFormatError('Expected dict for struct field #')")
+        lines.append('    try:')
+        for op in program:
+            code, field, arg = op
+            if code == OP_SCALAR_RUN:
+                values = ', '.join(f"item[{name!r}]" for name in arg[1])
+                lines.append(f"        out += {const(arg[0])}.pack({values})")
+                continue
+            if field.condition_code is not None or field.function or field.name == '#' or code not in (
+                    OP_SCALAR, OP_INT24, OP_FIXED_STRING, OP_VAR_STRING):
+                lines.append(f"        write_fields(out, {const([op])}, item, context)")
+                continue
+            lines.append(f"        v = item[{field.name!r}]")
+            if code == OP_SCALAR:
+                lines.append(f"        out += {const(arg)}.pack(v)")
+            elif code == OP_INT24:
+                lines.append("        if not (-8388608 <= v <= 8388607): "
+                             "raise BinaryFormatError(f'Value out of range for int24: {v}')")
+                lines.append("        out += int32.pack(v)[0:3]")
+            else:
+                if field.codec:
+                    lines.append(f"        v = {const(field.codec.encode)}(v)[0]")
+                else:
+                    lines.append(f"        v = v.encode({field.encoding!r})")
+                if code == OP_FIXED_STRING:
+                    lines.append(f"        out += {const(arg)}.pack(v)")
+                else:
+                    lines.append("        out += len_struct.pack(len(v))")
+                    lines.append("        out += v")
+        lines.append('        pass')
+        lines.append('    except KeyError as e:')
+        lines.append("        raise BinaryFormatError(f'Missing field in data: {e.args[0]}')")
+        return self._exec_generated(lines, '<generated element writer>', namespace, 'write')
+    
+    def _codegen_record_writer(self):
+        """Generate a writer packing a fully fixed-size record with one call, no value list.
+        
+        Any lookup failure is handed to _gather_record, which raises the usual error.
+        """
+        record, layout = self._record
+        namespace = {'record': record, 'layout': layout, 'gather': self._gather_record}
+        lines = ['def write(data):', '    try:']
+        
+        def leaves(layout, target):
+            args = []
+            for name, sub in layout:
+                if sub is None:
+                    args.append(f"{target}[{name!r}]")
+                    continue
+                child = f"s{len(lines)}"
+                lines.append(f"        {child} = {target}[{name!r}]")
+                if self.validate:
+                    lines.append(f"        if not isinstance({child}, dict): raise TypeError")
+                args.extend(leaves(sub, child))
+            return args
+        
+        args = leaves(layout, 'data')
+        lines.append(f"        return record.pack({', '.join(args)})")
+        lines.extend(['    except (KeyError, TypeError):',
+                      '        gather(layout, data, [])',
+                      '        raise'])
+        return self._exec_generated(lines, '<generated record writer>', namespace, 'write')
+    
+    def _union_element_reader(self, union_op: tuple):
+        """Generate an element reader that peeks the discriminator and branches to the variant's inlined reader.
+        
+        Returns None when a variant is not a plain struct; anything unusual at read
+        time (short buffer, unknown or non-integer variant) is left to the interpreter.
+        """
+        _, discriminator, variants = union_op[2]
+        if discriminator is None or any(read_op[0] != OP_STRUCT for read_op, _ in variants.values()):
+            return None
+        namespace = self._reader_namespace()
+        namespace['peek'] = discriminator.unpack_from
+        namespace['union_op'] = union_op
+        lines = ['def read(buf, o, end, result, items):',
+                 f'    if o + {discriminator.size} > end:',
+                 '        return read_field(buf, o, union_op, result, items)',
+                 '    d = peek(buf, o)[0]']
+        keyword = 'if'
+        for key, (read_op, _) in variants.items():
+            if isinstance(key, int):
+                lines.append(f'    {keyword} d == {key!r}:')
+                lines.extend('    ' + line for line in self._element_reader_body(read_op[2], namespace))
+                keyword = 'elif'
+        lines.append('    return read_field(buf, o, union_op, result, items)')
+        return self._exec_generated(lines, '<generated union element reader>', namespace, 'read')
+    
+    def _reader_namespace(self) -> Dict[str, Any]:
+        """Return the globals shared by generated readers."""
+        return {
+            'read_field': self._deserialize_field,
+            'read_fields': self._deserialize_fields,
+            'read_run': self._deserialize_run,
+            'int32': self._structs['int32'],
+            'uint32': self._structs['uint32'],
+            'len_struct': self._len_struct,
+        }
+    
+    def _emit_reader(self, program: List[tuple], target: str, lines: List[str],
+                     namespace: Dict[str, Any], seen: set) -> None:
+        """Emit reader source for a program writing into the dict variable `target`.
+
+        Scalars, strings, structs and conditions are inlined; every other op is
+        delegated to the interpreter, writing into the same dict.
+        """
+        def const(value):
+            name = f"k{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        def emit(line):
+            lines.append('    ' + line)
+
+        def emit_op(op):
+            code, field, arg = op
+            if code != OP_SCALAR_RUN and field.condition_code is not None:
+                # The validated condition source is inlined; the op is emitted unconditionally under it
+                emit(f"context, data = result, {target}")
+                # Unparsed from the validated tree, so comments and line breaks in the source are dropped
+                emit(f"if ({ast.unparse(ast.parse(field.condition, mode='eval'))}):")
+                body = []
+                unconditional = replace(field, condition=None, condition_code=None)
+                self._emit_reader([(code, unconditional, arg)], target, body, namespace, seen)
+                lines.extend('    ' + line for line in body)
+                seen.add(field.name)
+                return
+            # On a short buffer the interpreter re-reads the op and raises the usual error
+            fail = f"read_field(buf, o, {const(op)}, result, {target}, {field.name!r})"
+            if code == OP_SCALAR_RUN:
+                record, names, _ = arg
+                targets = ', '.join(f"{target}[{name!r}]" for name in names)
+                emit(f"if o + {record.size} > end: read_run(buf, o, {const(arg)}, result, {target})")
+                emit(f"{targets} = {const(record)}.unpack_from(buf, o)")
+                emit(f"o += {record.size}")
+                seen.update(names)
+            elif code == OP_SCALAR and field.name != '#':
+                emit(f"if o + {arg.size} > end: {fail}")
+                emit(f"{target}[{field.name!r}] = {const(arg)}.unpack_from(buf, o)[0]")
+                emit(f"o += {arg.size}")
+                seen.add(field.name)
+            elif code == OP_INT24 or code == OP_UINT24:
+                packer = 'int32' if code == OP_INT24 else 'uint32'
+                emit(f"if o + 4 <= end: {target}[{field.name!r}] = {packer}.unpack_from(buf, o)[0] & {self._int24_mask}")
+                emit(f"elif o + 3 > end: {fail}")
+                emit(f"else: {target}[{field.name!r}] = {packer}.unpack(buf[o:o + 3] + b'\\x00')[0]")
+                emit("o += 3")
+                seen.add(field.name)
+            elif code == OP_FIXED_STRING:
+                emit(f"if o + {field.size} > end: {fail}")
+                emit(f"s = buf[o:o + {field.size}].rstrip(b'\\x00')")
+                emit(f"o += {field.size}")
+                emit(f"{target}[{field.name!r}] = {self._emit_decode(field, const)}")
+                seen.add(field.name)
+            elif code == OP_VAR_STRING:
+                size = self._len_struct.size
+                emit(f"if o + {size} > end: {fail}")
+                emit("n = len_struct.unpack_from(buf, o)[0]")
+                emit(f"if o + {size} + n > end: {fail}")
+                emit(f"s = buf[o + {size}:o + {size} + n]")
+                emit(f"o += {size} + n")
+                emit(f"{target}[{field.name!r}] = {self._emit_decode(field, const)}")
+                seen.add(field.name)
+            elif code == OP_PRIM_ARRAY and not field.length_field and field.size and 0 < field.size < self.ARRAY_BULK_THRESHOLD:
+                # Short fixed-size primitive array: one Struct built here, one unpack per read
+                batch = self._batch_struct(arg, field.size)
+                emit(f"if o + {batch.size} > end: {fail}")
+                emit(f"{target}[{field.name!r}] = list({const(batch)}.unpack_from(buf, o))")
+                emit(f"o += {batch.size}")
+                seen.add(field.name)
+            elif code == OP_FIXED_STRUCT and field.name not in seen:
+                _, record, layout = arg
+                emit(f"if o + {record.size} > end: {fail}")
+                emit(f"{target}[{field.name!r}] = {const(self._build_record)}("
+                     f"{const(layout)}, iter({const(record)}.unpack_from(buf, o)))")
+                emit(f"o += {record.size}")
+                seen.add(field.name)
+            elif code == OP_STRUCT and field.name not in seen and any(
+                    sub[0] == OP_SCALAR_RUN or (sub[1].condition_code is None and sub[1].name != '#' and sub[0] in (
+                        OP_SCALAR, OP_INT24, OP_UINT24, OP_FIXED_STRING, OP_VAR_STRING)) for sub in arg):
+                # The struct always writes a value, so its dict can be attached up front
+                if field.name == '#':
+                    self._emit_reader(arg, target, lines, namespace, seen)
+                else:
+                    child = const(None)
+                    emit(f"{child} = {target}[{field.name!r}] = {{}}")
+                    self._emit_reader(arg, child, lines, namespace, set())
+                    seen.add(field.name)
+            else:
+                emit(f"o = {fail}")
+                seen.add(field.name)
+
+        def fusable(op):
+            code, field, _ = op
+            if code == OP_SCALAR_RUN:
+                return True
+            if field.condition_code is not None or field.name == '#':
+                return False
+            if code == OP_STRUCT:
+                return field.name not in seen and field.name not in names and self._fixed_layout(field) is not None
+            return code == OP_SCALAR or (code == OP_FIXED_STRUCT and field.name not in seen and field.name not in names)
+        
+        # Coalesce adjacent scalars, runs and fixed structs into one unpack per group
+        group = []
+        names = set()
+        for op in program + [None]:
+            if op is not None and fusable(op):
+                group.append(op)
+                names.update(op[2][1] if op[0] == OP_SCALAR_RUN else (op[1].name,))
+                continue
+            if len(group) > 1:
+                self._emit_group(group, target, emit, const)
+                seen.update(names)
+            elif group:
+                emit_op(group[0])
+            group = []
+            names = set()
+            if op is not None:
+                emit_op(op)
+    
+    def _emit_group(self, group: List[tuple], target: str, emit, const) -> None:
+        """Emit one bounds check and one unpack for a group of fixed-size ops."""
+        formats = []
+        assignments = []
+        index = 0
+        for code, field, arg in group:
+            if code == OP_SCALAR_RUN:
+                formats.append(arg[0].format[1:])
+                for name in arg[1]:
+                    assignments.append(f"{target}[{name!r}] = v[{index}]")
+                    index += 1
+            elif code == OP_SCALAR:
+                formats.append(arg.format[1:])
+                assignments.append(f"{target}[{field.name!r}] = v[{index}]")
+                index += 1
+            else:
+                # Primitive-only struct: its dict is built from a display over the values
+                codes, layout = self._fixed_layout(field)
+                formats.append(codes)
+                source, index = self._emit_layout(layout, index)
+                assignments.append(f"{target}[{field.name!r}] = {source}")
+        record = struct.Struct(self.endian_char + ''.join(formats))
+        # On a short buffer the interpreter replays the group and raises the usual error
+        emit(f"if o + {record.size} > end: read_fields(buf, o, {const(group)}, result, {target})")
+        emit(f"v = {const(record)}.unpack_from(buf, o)")
+        for line in assignments:
+            emit(line)
+        emit(f"o += {record.size}")
+    
+    def _emit_layout(self, layout: tuple, index: int):
+        """Return a dict display reading layout leaves from `v` starting at index, and the next index."""
+        items = []
+        for name, sub in layout:
+            if sub is None:
+                items.append(f"{name!r}: v[{index}]")
+                index += 1
+            else:
+                source, index = self._emit_layout(sub, index)
+                items.append(f"{name!r}: {source}")
+        return '{' + ', '.join(items) + '}', index
+    
+    def _array_length(self, field: FieldDefinition, context: Dict[str, Any]) -> int:
+        """Resolve an array's element count from length_field or size; negative sizes mean read to end."""
+        if field.length_field:
+            if isinstance(field.length_field, int):
+                array_length = field.length_field
+            else:
+                array_length = field.length_code(context)
+            if array_length is None:
+                raise BinaryFormatError(f"Length field {field.length_field} not found for array {field.name}")
+            return array_length
+        elif field.size:
+            return field.size
+        raise BinaryFormatError(f"Array field {field.name} must have either size or length_field defined")
+    
+    def _batch_struct(self, element: struct.Struct, count: int) -> struct.Struct:
+        """Return a cached Struct packing `count` elements of the given primitive or record Struct."""
+        key = (element, count)
+        batch = self._batch_structs.get(key)
+        if batch is None:
+            codes = element.format[1:]
+            batch = struct.Struct(self.endian_char + (f"{count}{codes}" if len(codes) == 1 else codes * count))
+            if len(self._batch_structs) < self.PATH_CACHE_SIZE:
+                self._batch_structs[key] = batch
+        return batch
+    
+    def _pack_records(self, out: bytearray, record: struct.Struct, values: List[Any], count: int) -> None:
+        """Append `count` records whose values lie back to back in `values`, RECORD_BATCH records per call."""
+        if not count:
+            return
+        full, rest = divmod(count, self.RECORD_BATCH)
+        step = len(values) // count * self.RECORD_BATCH
+        if full:
+            batch = self._batch_struct(record, self.RECORD_BATCH)
+            for start in range(0, full * step, step):
+                out += batch.pack(*values[start:start + step])
+        if rest:
+            out += self._batch_struct(record, rest).pack(*values[full * step:])
+    
+    def _emit_decode(self, field: FieldDefinition, const) -> str:
+        """Return the source expression decoding the bytes in `s` for a string field."""
+        if field.codec:
+            return f"{const(field.codec.decode)}(s, 'replace')[0]"
+        return f"s.decode({field.encoding!r}, errors='replace')"
+    
     def serialize_to_binary(self, data: Dict[str, Any], output_file: str = None) -> bytes:
         try:
-            buffer = io.BytesIO()
-            self._serialize_phase1(buffer, self.format_json_dict['fields'], data)
-            
-            # Initialize scope resolver with collected offsets
-            self.scope_resolver = ScopeResolver(self.field_offsets, self.field_sizes)
+            # Start from clean per-call state; the handler is reused across calls
+            self.calculated_fields.clear()
+            self.field_offsets.clear()
+            self.field_sizes.clear()
             
-            # Phase 2: Calculate and update calculated fields
-            final_data = self._serialize_phase2(buffer.getvalue(), data)
+            out = bytearray()
+            if self._record is not None:
+                # Fixed-size format: the whole record is packed by one call, straight to bytes
+                final_data = self._record_writer(data)
+            elif self._crc_tail is not None:
+                # Lone trailing checksum over everything before it: no offsets to track or patch
+                field, head_program = self._crc_tail
+                if field.name not in data:
+                    raise BinaryFormatError(f"Missing field in data: {field.name}")
+                self._serialize_fields(out, head_program, data, data)
+                self.calculated_fields.append(field)
+                with memoryview(out) as view:
+                    value = self._calculate_function_value(field, view, data)
+                out += self._structs[field.type].pack(value)
+                final_data = bytes(out)
+            elif self._has_calculated_fields:
+                # Phase 1: Accumulate the whole payload in one buffer
+                self._serialize_phase1(out, self._program, data)
+                
+                # Phase 2: Calculate and update calculated fields
+                final_data = self._serialize_phase2(out, data)
+            else:
+                # Nothing to patch: no offsets to track, so adjacent scalars pack together
+                self._serialize_fields(out, self._read_program, data, data)
+                final_data = bytes(out)
             
             # Write final data
             if output_file is not None:
@@ -278,41 +1006,50 @@ class BinaryFormatHandler:
         except Exception as e:
             raise BinaryFormatError(f"Serialization failed: {e}")
         
-    def _serialize_phase1(self, f: BinaryIO, field_defs: List[Dict[str, Any]], context: Dict[str, Any]) -> None:
+    def _serialize_phase1(self, out: bytearray, program: List[tuple], context: Dict[str, Any]) -> None:
         """Phase 1: Serialize structure with placeholders."""
-        for field_def in field_defs:
-            field = self._parse_field_definition(field_def)
- 
+        for op in program:
+            field = op[1]
             # Check conditions
-            if field.condition is not None and not eval(field.condition, {}, {'context': context, 'data': context}):
+            if field.condition_code is not None and not field.condition_code(context, context):
                 continue
             
-            if field.name not in context:
+            try:
+                value = context[field.name]
+            except KeyError:
                 raise BinaryFormatError(f"Missing field in data: {field.name}")
-            if field.type not in self.TYPE_MAP and field.type not in ['uint24','int24','string', 'array', 'struct','union']:
+            if op[0] == OP_UNSUPPORTED:
                 raise BinaryFormatError(f"Unsupported field type: {field.type}")
 
-            value = context[field.name]
-            start_offset = f.tell()
+            start_offset = len(out)
             self.field_offsets[field.name] = start_offset
             
             # Handle calculated fields
             if field.function:
                 self.calculated_fields.append(field)
-                format_str = self.endian_char + self.TYPE_MAP[field.type]
-                f.write(struct.pack(format_str, 0))
-                self.field_sizes[field.name] = struct.calcsize(format_str)
+                # Zero placeholder, patched in phase 2
+                size = self._structs[field.type].size
+                out += bytes(size)
+                self.field_sizes[field.name] = size
             # Regular field serialization
             else:
-                value = context[field.name]
-                self._serialize_field(f, field, value, context)
+                self._serialize_field(out, op, value, context)
                 # Record field size
-                end_offset = f.tell()
+                end_offset = len(out)
                 self.field_sizes[field.name] = end_offset - start_offset
 
-    def _serialize_phase2(self, data: bytes, context: Dict[str, Any]) -> bytes:
-        """Phase 2: Calculate and update calculated fields."""
-        data_array = bytearray(data)
+    def _serialize_phase2(self, out: bytearray, context: Dict[str, Any]) -> bytes:
+        """Phase 2: Calculate and update calculated fields in place."""
+        if not self.calculated_fields:
+            return bytes(out)
+        # Scopes are views of the output itself: every value is computed before any is
+        # patched in, so each one sees the payload with all placeholders still zero
+        data = memoryview(out)
+        # Calculated fields sharing a scope (e.g. several checksums over entire_file) share one slice
+        scopes = {}
+        # CRCs over all previous bytes continue from the last one with the same parameters
+        running = {}
+        patches = []
         
         for field in self.calculated_fields:
             offset = self.field_offsets.get(field.name)
@@ -339,48 +1076,45 @@ class BinaryFormatHandler:
                 field.function_scope_end
             )
             
-            # Get scope data based on resolved scope definition
-            scope_data = self.scope_resolver.get_scope_data(
-                data,
-                scope_type,
-                scope_start,
-                scope_end,
-                offset
-            )
-            
-            # Calculate value based on function
-            value = self._calculate_function_value(field, scope_data, context)
+            if scope_type in ("all_previous", "from_start") and field.function in ("crc32", "crc16"):
+                crc_func = self._field_crc_function(field)
+                start, crc = running.get(crc_func, (0, None))
+                if crc is None:
+                    value = crc_func(data[:offset])
+                else:
+                    value = crc_func(data[start:offset], crc)
+                running[crc_func] = (offset, value)
+            else:
+                # Get scope data based on resolved scope definition
+                scope_key = (scope_type, scope_start, scope_end,
+                             None if scope_type in ScopeResolver.FIXED_SCOPES else offset)
+                scope_data = scopes.get(scope_key)
+                if scope_data is None:
+                    scope_data = scopes[scope_key] = self.scope_resolver.get_scope_data(
+                        data,
+                        scope_type,
+                        scope_start,
+                        scope_end,
+                        offset
+                    )
+                
+                # Calculate value based on function
+                value = self._calculate_function_value(field, scope_data, context)
             
-            # Update the data
-            if field.type in self.TYPE_MAP:
-                format_str = self.endian_char + self.TYPE_MAP[field.type]
-                struct.pack_into(format_str, data_array, offset, value)
+            packer = self._structs.get(field.type)
+            if packer is not None:
+                patches.append((packer, offset, value))
         
-        return bytes(data_array)
+        for packer, offset, value in patches:
+            packer.pack_into(out, offset, value)
+        return bytes(out)
     
-    def _calculate_function_value(self, field: FieldDefinition, data: bytes, context: Dict[str, Any]) -> Any:
+    def _calculate_function_value(self, field: FieldDefinition, data: Union[bytes, memoryview], context: Dict[str, Any]) -> Any:
         """Calculate function value with parameters."""
         params = field.function_parameters or {}
         
-        if field.function == "crc32":
-            polynomial = params.get('polynomial', 0x104C11DB7)  # CRC-32 polynomial
-            initial_value = params.get('initial_value', 0xFFFFFFFF)
-            reverse = params.get('reverse', True)
-            xor_out = params.get('xor_out', 0xFFFFFFFF)
-            
-            # Create CRC function using crcmod
-            crc_func = crcmod.mkCrcFun(polynomial, initCrc=initial_value, rev=reverse, xorOut=xor_out)
-            return crc_func(data)
-        elif field.function == "crc16":
-            # Enhanced CRC16 with configurable parameters
-            polynomial = params.get('polynomial', 0x18005)  # CRC-16-CCITT polynomial
-            initial_value = params.get('initial_value', 0xFFFF)
-            reverse = params.get('reverse', True)
-            xor_out = params.get('xor_out', 0x0000)
-            
-            # Create CRC function using crcmod
-            crc_func = crcmod.mkCrcFun(polynomial, initCrc=initial_value, rev=reverse, xorOut=xor_out)
-            return crc_func(data)
+        if field.function == "crc32" or field.function == "crc16":
+            return self._field_crc_function(field)(data)
         elif field.function == "count":
             key = params.get("key", "")
             if not key:
@@ -403,104 +1137,219 @@ class BinaryFormatHandler:
         else:
             raise BinaryFormatError(f"Unknown function: {field.function}")
 
-    def _serialize_fields(self, f: BinaryIO, fields: List[FieldDefinition], data: Dict[str, Any], context: Dict[str, Any]) -> None:
-        """Serialize a list of fields to binary stream."""
-        for field in fields:
+    def _field_crc_function(self, field: FieldDefinition):
+        """Return the CRC function configured by a crc32/crc16 field's parameters."""
+        params = field.function_parameters or {}
+        if field.function == "crc32":
+            polynomial = params.get('polynomial', 0x104C11DB7)  # CRC-32 polynomial
+            initial_value = params.get('initial_value', 0xFFFFFFFF)
+            reverse = params.get('reverse', True)
+            xor_out = params.get('xor_out', 0xFFFFFFFF)
+        else:
+            # Enhanced CRC16 with configurable parameters
+            polynomial = params.get('polynomial', 0x18005)  # CRC-16-CCITT polynomial
+            initial_value = params.get('initial_value', 0xFFFF)
+            reverse = params.get('reverse', True)
+            xor_out = params.get('xor_out', 0x0000)
+        return self._crc_function(polynomial, initial_value, reverse, xor_out)
+
+    def _crc_function(self, polynomial: int, initial_value: int, reverse: bool, xor_out: int):
+        """Return a CRC function for the given crcmod-style parameters, cached per parameter set.
+
+        Like crcmod's, the function takes an optional running CRC to continue from.
+        """
+        key = (polynomial, initial_value, reverse, xor_out)
+        crc_func = self._crc_funcs.get(key)
+        if crc_func is None:
+            if polynomial == 0x104C11DB7 and reverse and xor_out == 0xFFFFFFFF:
+                # Reflected CRC-32/IEEE: zlib's C implementation, seeded like crcmod's initCrc
+                crc_func = lambda data, crc=initial_value: zlib.crc32(data, crc)
+            elif polynomial == 0x11021 and not reverse and xor_out == 0:
+                # CRC-16/CCITT (XMODEM family)
+                crc_func = lambda data, crc=initial_value: binascii.crc_hqx(data, crc)
+            else:
+                crc_func = crcmod.mkCrcFun(polynomial, initCrc=initial_value, rev=reverse, xorOut=xor_out)
+            self._crc_funcs[key] = crc_func
+        return crc_func
+    
+    def _serialize_fields(self, out: bytearray, program: List[tuple], data: Dict[str, Any], context: Dict[str, Any]) -> None:
+        """Serialize a compiled list of fields into the output buffer."""
+        for op in program:
+            if op[0] == OP_SCALAR_RUN:
+                record, names, _ = op[2]
+                try:
+                    out += record.pack(*[data[name] for name in names])
+                except KeyError as e:
+                    raise BinaryFormatError(f"Missing field in data: {e.args[0]}")
+                continue
+            field = op[1]
             # Check if field should be included based on condition
-            if field.condition is not None:
-                pass
-            if field.condition and not eval(field.condition, {}, {'context': context,'data': data}):
+            if field.condition_code is not None and not field.condition_code(context, data):
                 continue
             
             # Skip functional fields in simple serialization - they should use two-phase
             if field.function:
                 # Write placeholder for functional fields
-                if field.type in self.TYPE_MAP:
-                    format_str = self.endian_char + self.TYPE_MAP[field.type]
-                    f.write(struct.pack(format_str, 0))
+                if op[0] == OP_SCALAR:
+                    out += bytes(op[2].size)
                 continue
                 
-            if field.name not in data:
+            try:
+                value = data[field.name]
+            except KeyError:
                 raise BinaryFormatError(f"Missing field in data: {field.name}")
-                
-            value = data[field.name]
-            self._serialize_field(f, field, value, context)
+            self._serialize_field(out, op, value, context)
     
-    def _serialize_field(self, f: BinaryIO, field: FieldDefinition, value: Any, context: Dict[str, Any]) -> None:
-        """Serialize a single field to binary stream."""
-        if field.type in self.TYPE_MAP:
+    def _serialize_field(self, out: bytearray, op: tuple, value: Any, context: Dict[str, Any]) -> None:
+        """Serialize a single compiled field into the output buffer."""
+        code, field, arg = op
+        if code == OP_SCALAR:
             # Basic numeric type
-            format_str = self.endian_char + self.TYPE_MAP[field.type]
-            f.write(struct.pack(format_str, value))
-        elif field.type == 'int24':
+            out += arg.pack(value)
+        elif code == OP_INT24:
             if not (-8388608 <= value <= 8388607):
                 raise BinaryFormatError(f"Value out of range for int24: {value}")
-            packed = struct.pack(self.endian_char + 'i', value)[0:3]
-            f.write(packed)
-        elif field.type == 'string':
-            # String type
-            encoded = value.encode(field.encoding)
-            if field.size:
-                # Fixed-size string
-                encoded = encoded[:field.size].ljust(field.size, b'\x00')
-                f.write(encoded)
-            else:
-                # Variable-size string (write length first)
-                length_format = self.endian_char + 'I'
-                f.write(struct.pack(length_format, len(encoded)))
-                f.write(encoded)
+            out += arg.pack(value)[0:3]
+        elif code == OP_FIXED_STRING:
+            encoded = field.codec.encode(value)[0] if field.codec else value.encode(field.encoding)
+            out += arg.pack(encoded)
+        elif code == OP_VAR_STRING:
+            # Variable-size string (write length first)
+            encoded = field.codec.encode(value)[0] if field.codec else value.encode(field.encoding)
+            out += self._len_struct.pack(len(encoded))
+            out += encoded
                 
-        elif field.type == 'array':
+        elif code == OP_COLUMN_ARRAY:
+            # One list per element field, interleaved back into records
+            if self.validate and not isinstance(value, dict):
+                raise BinaryFormatError(f"Expected dict of lists for columnar array field {field.name}")
+            _, record, names = arg
+            try:
+                columns = [value[name] for name in names]
+            except KeyError as e:
+                raise BinaryFormatError(f"Missing field in data: {e.args[0]}")
+            array_length = self._array_length(field, context)
+            if array_length < 0 and not field.length_field:
+                array_length = len(columns[0])
+            for name, column in zip(names, columns):
+                if len(column) < array_length:
+                    raise BinaryFormatError(f"Column {name} of array field {field.name} has fewer than {array_length} values")
+            # Interleave the columns into one flat row-major list with slice assignments
+            width = len(columns)
+            values = [None] * (array_length * width)
+            for i, column in enumerate(columns):
+                values[i::width] = column[:array_length]
+            self._pack_records(out, record, values, array_length)
+        elif code == OP_PRIM_ARRAY and isinstance(value, (bytes, bytearray)) and arg.format[-1] == 'B':
+            # A uint8 array given as bytes is copied as is
+            array_length = self._array_length(field, context)
+            if array_length < 0 and not field.length_field:
+                array_length = len(value)
+            out += value[:array_length]
+            if len(value) < array_length:
+                # Pad with zeros for fixed-size arrays
+                out += bytes(array_length - len(value))
+        elif code == OP_PRIM_ARRAY or code == OP_ARRAY or code == OP_RECORD_ARRAY or code == OP_INT24_ARRAY:
             # Array type
-            if not isinstance(value, list):
+            if self.validate and not isinstance(value, list):
                 raise BinaryFormatError(f"Expected list for array field {field.name}")
                 
-            # Write array length if not fixed
-            if field.length_field:
-                if isinstance(field.length_field,int):
-                    array_length = field.length_field
-                else:
-                    array_length = eval(field.length_field, {}, {'context': context})
-                if array_length is None:
-                    raise BinaryFormatError(f"Length field {field.length_field} not found for array {field.name}")
-            elif field.size:
-                if(field.size < 0):
-                    array_length = len(value)
-                else:
-                    array_length = field.size
-            else:
-                raise BinaryFormatError(f"Array field {field.name} must have either size or length_field defined")
+            array_length = self._array_length(field, context)
+            if array_length < 0 and not field.length_field:
+                # Read-to-end array: write every element
+                array_length = len(value)
             
+            if code == OP_PRIM_ARRAY:
+                # Primitive elements: pack the whole array with a single Struct call
+                batch = self._batch_struct(arg, array_length)
+                values = value[:array_length]
+                if len(values) < array_length:
+                    # Pad with zeros for fixed-size arrays
+                    values = values + [0] * (array_length - len(values))
+                out += batch.pack(*values)
+                return
+            if code == OP_INT24_ARRAY and arg[0][0] == OP_INT24:
+                # Pack as int32 in one call, then keep the first 3 bytes of every 4
+                values = value[:array_length]
+                if len(values) < array_length:
+                    values = values + [0] * (array_length - len(values))
+                if values and (min(values) < -8388608 or max(values) > 8388607):
+                    bad = next(v for v in values if not (-8388608 <= v <= 8388607))
+                    raise BinaryFormatError(f"Value out of range for int24: {bad}")
+                wide = self._batch_struct(arg[1], array_length).pack(*values)
+                narrow = bytearray(3 * array_length)
+                for i in range(3):
+                    narrow[i::3] = wide[i::4]
+                out += narrow
+                return
+            if code == OP_RECORD_ARRAY:
+                # Primitive-only struct elements: gather every value into one flat list, packed in batches
+                _, record, names, layout = arg
+                if len(value) < array_length:
+                    raise BinaryFormatError("Expected dict for struct field #")
+                elements = value[:array_length]
+                if self.validate and set(map(type, elements)) - {dict} and not all(
+                        isinstance(element, dict) for element in elements):
+                    raise BinaryFormatError("Expected dict for struct field #")
+                if layout is None:
+                    try:
+                        values = [element[name] for element in elements for name in names]
+                    except KeyError as e:
+                        raise BinaryFormatError(f"Missing field in data: {e.args[0]}")
+                else:
+                    values = []
+                    for element in elements:
+                        self._gather_record(layout, element, values)
+                self._pack_records(out, record, values, array_length)
+                return
             # Serialize array elements
-            element_fields = field.fields[0] if field.fields else None
+            element_op = arg[0]
+            element_writer = arg[2] if code == OP_ARRAY else None
+            if element_writer is not None and array_length <= len(value):
+                for element in value[:array_length]:
+                    element_writer(out, element, context)
+                return
             for i in range(array_length):
                 if i < len(value):
-                    self._serialize_field(f, element_fields, value[i], context)
+                    self._serialize_field(out, element_op, value[i], context)
                 else:
                     # Pad with zeros for fixed-size arrays
-                    self._serialize_field(f, element_fields, 0, context)
+                    self._serialize_field(out, element_op, 0, context)
                     
-        elif field.type == 'struct':
+        elif code == OP_STRUCT:
             # Nested structure
-            if not isinstance(value, dict):
+            if self.validate and not isinstance(value, dict):
                 raise BinaryFormatError(f"Expected dict for struct field {field.name}")
-            self._serialize_fields(f, field.fields, value, context)
-        elif field.type == 'union':
-            if not isinstance(value,dict):
+            self._serialize_fields(out, arg, value, context)
+        elif code == OP_FIXED_STRUCT:
+            if self.validate and not isinstance(value, dict):
+                raise BinaryFormatError(f"Expected dict for struct field {field.name}")
+            _, record, layout = arg
+            values = []
+            self._gather_record(layout, value, values)
+            out += record.pack(*values)
+        elif code == OP_UNION:
+            if self.validate and not isinstance(value,dict):
                 raise BinaryFormatError(f"Expected dict for union field {field.name}")
-            discriminator_value = self._get_nested_value(context, field.discriminator_field)
+            # The discriminator normally sits in the union's own value (e.g. array elements)
+            try:
+                discriminator_value = value[field.discriminator_field]
+            except KeyError:
+                discriminator_value = self._get_nested_value(context, field.discriminator_path)
             if discriminator_value is None:
                 raise BinaryFormatError(f"Discriminator field '{field.discriminator_field}' not found for union {field.name}")
-            variant_key = str(discriminator_value)
-            if variant_key not in field.union_variants:
-                raise BinaryFormatError(f"Unknown union variant '{variant_key}' for field {field.name}")
-            variant_fields = field.union_variants[variant_key]
-            self._serialize_fields(f,variant_fields,value,context)
+            variant = arg[2].get(discriminator_value)
+            if variant is None:
+                # Discriminators given as strings (or other spellings) match like the JSON keys
+                variant = arg[2].get(self._variant_key(str(discriminator_value)))
+            if variant is None:
+                raise BinaryFormatError(f"Unknown union variant '{discriminator_value}' for field {field.name}")
+            self._serialize_fields(out, variant[1], value, context)
             
         else:
             raise BinaryFormatError(f"Unsupported field type: {field.type}")
     
-    def deserialize_from_binary(self, input_source: Union[str, bytes]) -> Dict[str, Any]:
+    def deserialize_from_binary(self, input_source: Union[str, bytes, bytearray, memoryview]) -> Dict[str, Any]:
         """
         Deserialize binary data to JSON data according to format definition.
         
@@ -508,46 +1357,124 @@ class BinaryFormatHandler:
             input_source: Can be one of:
                 - Path to binary file
                 - Bytes object containing binary data
+                - Any other bytes-like object (memoryview, mmap, array, ...)
+                - Binary stream opened for reading, read from its current position
             
         Returns:
             Dictionary containing the deserialized data
         """
         try:
             if isinstance(input_source, str):
-                # File path
+                # File path: read it whole, or map large files read-only so fields are unpacked in place
                 with open(input_source, 'rb') as f:
-                    fields = [self._parse_field_definition(field_def) for field_def in self.format_json_dict['fields']]
-                    result = {}
-                    self._deserialize_fields(f, fields, result, '')
-                    return result
-            elif isinstance(input_source, (bytes, bytearray)):
-                # Bytes object
-                with io.BytesIO(input_source) as f:
-                    fields = [self._parse_field_definition(field_def) for field_def in self.format_json_dict['fields']]
-                    result = {}
-                    self._deserialize_fields(f, fields, result, '')
-                    return result
+                    if os.fstat(f.fileno()).st_size < self.MMAP_MIN_SIZE:
+                        # Setting up and faulting in a mapping costs more than copying a small file
+                        buf = f.read()
+                    else:
+                        try:
+                            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                                # Fields are read front to back: ask for aggressive readahead
+                                buf.madvise(mmap.MADV_SEQUENTIAL)
+                        except (ValueError, OSError):
+                            # Non-mappable files are read into memory instead
+                            buf = f.read()
+                try:
+                    return self._deserialize_buffer(buf)
+                finally:
+                    if isinstance(buf, mmap.mmap):
+                        buf.close()
+            elif isinstance(input_source, (bytes, bytearray, mmap.mmap)):
+                # In-memory buffer: fields are unpacked from it directly
+                return self._deserialize_buffer(input_source)
+            elif hasattr(input_source, 'read'):
+                # Open binary stream (pipe, socket, BytesIO...): one read from the current position
+                return self._deserialize_buffer(input_source.read())
             else:
-                raise BinaryFormatError(f"Unsupported input_source type: {type(input_source)}. Must be str (file path) or bytes.")
+                try:
+                    view = memoryview(input_source)
+                except TypeError:
+                    raise BinaryFormatError(f"Unsupported input_source type: {type(input_source)}. Must be str (file path), a bytes-like object or a binary stream.")
+                with view:
+                    if isinstance(view.obj, (bytes, bytearray)) and view.c_contiguous and view.nbytes == len(view.obj):
+                        # A view of a whole bytes object: read the object itself
+                        buf = view.obj
+                    else:
+                        # Strings are decoded from bytes slices, so take one contiguous copy
+                        buf = view.tobytes()
+                return self._deserialize_buffer(buf)
                 
         except Exception as e:
             raise BinaryFormatError(f"Deserialization failed: {e}")
     
-    def _deserialize_fields(self, f: BinaryIO, fields: List[FieldDefinition], context:Dict[str,Any]=None,path: str = '') -> Dict[str, Any]:
-        """Deserialize a list of fields from binary stream."""
-        for field in fields:
+    def deserialize_many(self, paths: List[str], prefetch: int = 8) -> List[Dict[str, Any]]:
+        """
+        Deserialize several binary files, returning their results in order.
+        
+        Up to `prefetch` upcoming files are read on worker threads while the
+        current one is parsed, so disk latency overlaps with decoding. Short
+        lists are simply deserialized one by one.
+        """
+        if len(paths) < self.PREFETCH_MIN_FILES or prefetch < 1:
+            return [self.deserialize_from_binary(path) for path in paths]
+        
+        def load(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        
+        results = []
+        remaining = iter(paths)
+        with ThreadPoolExecutor(max_workers=prefetch) as pool:
+            pending = deque(pool.submit(load, path) for path in islice(remaining, prefetch))
+            try:
+                while pending:
+                    try:
+                        data = pending.popleft().result()
+                    except OSError as e:
+                        raise BinaryFormatError(f"Deserialization failed: {e}")
+                    # Keep the window full while this file is parsed
+                    path = next(remaining, None)
+                    if path is not None:
+                        pending.append(pool.submit(load, path))
+                    results.append(self.deserialize_from_binary(data))
+            finally:
+                for future in pending:
+                    future.cancel()
+        return results
+    
+    def _deserialize_buffer(self, buf: Union[bytes, bytearray, mmap.mmap]) -> Dict[str, Any]:
+        """Deserialize the top-level fields from a buffer, starting at offset 0."""
+        return self._reader(buf)
+    
+    def _deserialize_fields(self, buf: bytes, offset: int, program: List[tuple], context: Dict[str, Any], target: Dict[str, Any]) -> int:
+        """Deserialize a compiled list of fields into `target`; returns the offset after the last field."""
+        for op in program:
+            if op[0] == OP_SCALAR_RUN:
+                offset = self._deserialize_run(buf, offset, op[2], context, target)
+                continue
+            field = op[1]
             # Check if field should be included based on condition
-            if field.condition is not None:
-                pass
-            data = self._get_nested_value(context, path)
-            if field.condition and not eval(field.condition, {}, {'context': context,'data': data}):
+            if field.condition_code is not None and not field.condition_code(context, target):
                 continue
-            self._deserialize_field(f, field, context,path)
+            offset = self._deserialize_field(buf, offset, op, context, target, field.name)
+        return offset
     
-    def _get_nested_value(self, data: Dict[str, Any], path: str) -> Any:
-        """Get a value from nested dictionary using dot notation."""
-        parts = path.split('.')
-        parts = [part.strip() for part in parts if part.strip()]  # Remove empty parts
+    def _deserialize_run(self, buf: bytes, offset: int, run: tuple, context: Dict[str, Any], target: Dict[str, Any]) -> int:
+        """Deserialize a fused run of scalar fields with one unpack call."""
+        record, names, ops = run
+        if offset + record.size > len(buf):
+            # Fall back to field-by-field reads so the partial result and error match
+            for op in ops:
+                offset = self._deserialize_field(buf, offset, op, context, target, op[1].name)
+            return offset
+        target.update(zip(names, record.unpack_from(buf, offset)))
+        return offset + record.size
+    
+    def _get_nested_value(self, data: Dict[str, Any], parts: tuple) -> Any:
+        """Get a value from nested dictionary following the keys of a dotted path split at parse time."""
+        if len(parts) == 1 and not ('[' in parts[0] and parts[0].endswith(']')):
+            # Common case: a single plain key
+            return data.get(parts[0]) if isinstance(data, dict) else None
         value = data
         for part in parts:
             if '[' in part and part.endswith(']'):
@@ -573,165 +1500,210 @@ class BinaryFormatHandler:
                 else:
                     return None
         return value
-
-    def _write_nested_value(self, data: Dict[str, Any], path: str, value: Any) -> None:
-        """Set a value in a nested dictionary using dot notation."""
-        parts = path.split('.')
-        parts = [part for part in parts if part]  # Remove empty parts
-        current = data
-        for i,part in enumerate(parts):
-            if '[' in part and part.endswith(']'):
-                field_name = part[:part.index('[')]
-                index_part = part[part.index('[')+1:-1]
-                if field_name not in current or not isinstance(current[field_name], list):
-                    current[field_name] = []
-                    
-                index = int(index_part)
-                if i == len(parts) - 1:
-                    while len(current[field_name]) <= index:
-                        current[field_name].append(None)
-                    current[field_name][index] = value
-                    return
-                else:
-                    while len(current[field_name]) <= index:
-                        current[field_name].append({})
-                    current = current[field_name][index]
-            else:
-                if i == len(parts) - 1:
-                    current[part] = value
-                    return
-                if part not in current or not isinstance(current[part], dict):
-                    current[part] = {}
-                current = current[part]
-        
     
-    def _deserialize_field(self, f: BinaryIO, field: FieldDefinition, context: Dict[str, Any], path: str = '') -> Any:
-        """Deserialize a single field from binary stream."""
-        if field.type in self.TYPE_MAP:
+    def _deserialize_field(self, buf: bytes, offset: int, op: tuple, context: Dict[str, Any],
+                           target: Union[Dict[str, Any], List[Any]], key: str = None) -> int:
+        """Deserialize a single compiled field into target[key], or append it to target when key is None.
+        
+        Returns the offset after the field.
+        """
+        code, field, arg = op
+        if code == OP_SCALAR:
             # Basic numeric type
-            if field.name != '#':
-                path += field.name
-            format_str = self.endian_char + self.TYPE_MAP[field.type]
-            size = struct.calcsize(format_str)
-            data = f.read(size)
-            if len(data) < size:
+            if offset + arg.size > len(buf):
                 raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
-            result = struct.unpack(format_str, data)[0]
-            self._write_nested_value(context, path, result)
+            result = arg.unpack_from(buf, offset)[0]
+            offset += arg.size
             
-        elif field.type == 'int24':
-            # Read 3 bytes for int24
-            path += field.name
-            data = f.read(3)
-            if len(data) < 3:
+        elif code == OP_INT24 or code == OP_UINT24:
+            # Read 3 bytes, decoded as a 4-byte word whose 4th byte is zero
+            if offset + 4 <= len(buf):
+                # Unpack in place and mask the extra byte instead of building a padded copy
+                result = arg.unpack_from(buf, offset)[0] & self._int24_mask
+            elif offset + 3 > len(buf):
                 raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
+            else:
+                result = arg.unpack(buf[offset:offset + 3] + b'\x00')[0]
+            offset += 3
             
-            result =  struct.unpack(self.endian_char + 'i', data + b'\x00')[0]
-            self._write_nested_value(context, path, result)
+        elif code == OP_FIXED_STRING:
+            # Fixed-size string
+            if offset + field.size > len(buf):
+                raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
+            # Remove null padding
+            data = buf[offset:offset + field.size].rstrip(b'\x00')
+            result = field.codec.decode(data, 'replace')[0] if field.codec else data.decode(field.encoding, errors='replace')
+            offset += field.size
             
-        elif field.type == 'uint24':
-            # Read 3 bytes for uint24
-            path += field.name
-            data = f.read(3)
-            if len(data) < 3:
+        elif code == OP_VAR_STRING:
+            # Variable-size string (read length first)
+            length_size = self._len_struct.size
+            if offset + length_size > len(buf):
+                raise BinaryFormatError(f"Unexpected end of file reading {field.name} length")
+            length = self._len_struct.unpack_from(buf, offset)[0]
+            offset += length_size
+            
+            if offset + length > len(buf):
                 raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
-            result = struct.unpack(self.endian_char + 'I', data + b'\x00')[0]
-            self._write_nested_value(context, path, result)
+            data = buf[offset:offset + length]
+            result = field.codec.decode(data, 'replace')[0] if field.codec else data.decode(field.encoding, errors='replace')
+            offset += length
             
-        elif field.type == 'string':
-            # String type
-            path += field.name
-            if field.size:
-                # Fixed-size string
-                data = f.read(field.size)
-                if len(data) < field.size:
-                    raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
-                # Remove null padding
-                result = data.rstrip(b'\x00').decode(field.encoding, errors='replace')
-                self._write_nested_value(context, path, result)
-                
-            else:
-                # Variable-size string (read length first)
-                length_format = self.endian_char + 'I'
-                length_size = struct.calcsize(length_format)
-                length_data = f.read(length_size)
-                if len(length_data) < length_size:
-                    raise BinaryFormatError(f"Unexpected end of file reading {field.name} length")
-                length = struct.unpack(length_format, length_data)[0]
-                
-                data = f.read(length)
-                if len(data) < length:
-                    raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
-                result = data.decode(field.encoding, errors='replace')
-                self._write_nested_value(context, path, result)
-                
-        elif field.type == 'array':
+        elif code == OP_COLUMN_ARRAY:
+            # Unpack every record, then transpose into one list per element field
+            _, record, names = arg
+            array_length = self._array_length(field, context)
+            if array_length < 0:
+                # Read to end: as many whole records as remain
+                array_length = (len(buf) - offset) // record.size
+            total_size = array_length * record.size
+            if offset + total_size > len(buf):
+                raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
+            with memoryview(buf) as view:
+                columns = list(zip(*record.iter_unpack(view[offset:offset + total_size])))
+            result = {name: list(columns[i]) if columns else [] for i, name in enumerate(names)}
+            offset += total_size
+        elif code == OP_PRIM_ARRAY or code == OP_ARRAY or code == OP_RECORD_ARRAY or code == OP_INT24_ARRAY:
             # Array type
-            if field.length_field:
-                if isinstance(field.length_field,int):
-                    array_length = field.length_field
-                else:
-                    array_length = eval(field.length_field, {}, {'context': context})
-                if array_length is None:
-                    raise BinaryFormatError(f"Length field {field.length_field} not found for array {field.name}")
-            elif field.size:
-                array_length = field.size
-            else:
-                raise BinaryFormatError(f"Array field {field.name} must have either size or length_field defined")
+            array_length = self._array_length(field, context)
+            if array_length < 0 and code == OP_PRIM_ARRAY:
+                # Read to end: every whole element left in the data, decoded in bulk like a sized array
+                array_length = max(len(buf) - offset, 0) // arg.size
             # Deserialize array elements
-            element_field = field.fields[0] if field.fields else None
-            if array_length >= 0:
-                for i in range(array_length):
-                    self._deserialize_field(f, element_field, context,path+field.name+f"[{i}]")
+            if array_length >= 0 and code == OP_PRIM_ARRAY:
+                # Primitive elements: unpack the whole array in one C-level call
+                element_field = field.fields[0]
+                total_size = array_length * arg.size
+                if offset + total_size > len(buf):
+                    raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
+                array_code = self._array_codes.get(element_field.type)
+                if array_code is not None and array_length >= self.ARRAY_BULK_THRESHOLD:
+                    # Bulk copy into a typed array, swapping bytes only if the host order differs
+                    values = array.array(array_code)
+                    # Copy straight from the buffer without an intermediate bytes slice
+                    with memoryview(buf) as view:
+                        values.frombytes(view[offset:offset + total_size])
+                    if self._need_swap:
+                        values.byteswap()
+                    result = values.tolist()
+                else:
+                    batch = self._batch_struct(arg, array_length)
+                    result = list(batch.unpack_from(buf, offset))
+                offset += total_size
+            elif array_length >= 0 and code == OP_INT24_ARRAY:
+                # Widen every 3-byte element with a zero 4th byte, then unpack all at once
+                element_op, wide = arg
+                total_size = array_length * 3
+                if offset + total_size > len(buf):
+                    raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
+                size = 4 * array_length
+                # Allocated per call (zero-filled), so concurrent reads on one handler never share it
+                padded = bytearray(size)
+                for i in range(3):
+                    padded[i:size:4] = buf[offset + i:offset + total_size:3]
+                result = list(self._batch_struct(wide, array_length).unpack_from(padded))
+                offset += total_size
+            elif array_length >= 0 and code == OP_RECORD_ARRAY:
+                # Primitive-only struct elements: one unpack call per element
+                _, record, names, layout = arg
+                total_size = array_length * record.size
+                if offset + total_size > len(buf):
+                    raise BinaryFormatError(f"Unexpected end of file reading {field.name}")
+                with memoryview(buf) as view:
+                    records = record.iter_unpack(view[offset:offset + total_size])
+                    if layout is None:
+                        result = [dict(zip(names, values)) for values in records]
+                    else:
+                        build = self._build_record
+                        result = [build(layout, iter(values)) for values in records]
+                offset += total_size
             else:
-                i = 0
-                while True:
-                    i += 1
-                    try:
-                        self._deserialize_field(f, element_field, context, path + field.name + f"[{i}]")
-                    except BinaryFormatError:
-                        print(f"Warning: Unexpected end of file while reading array {field.name}")
-                        print(f"file size: {f.tell()}, real size: {f.seek(0, io.SEEK_END)}")
-                        break
+                element_op = arg[0]
+                element_reader = arg[1] if code == OP_ARRAY else None
+                # Attach the list up front: length expressions may refer to earlier elements
+                items = []
+                if key is None:
+                    target.append(items)
+                else:
+                    target[key] = items
+                read = self._deserialize_field
+                end = len(buf)
+                if array_length >= 0:
+                    if element_reader is not None:
+                        for _ in range(array_length):
+                            offset = element_reader(buf, offset, end, context, items)
+                    else:
+                        for _ in range(array_length):
+                            offset = read(buf, offset, element_op, context, items)
+                else:
+                    # Read elements until the data runs out
+                    while True:
+                        try:
+                            if element_reader is not None:
+                                offset = element_reader(buf, offset, end, context, items)
+                            else:
+                                offset = read(buf, offset, element_op, context, items)
+                        except BinaryFormatError:
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug("Array %s ended at offset %d of %d", field.name, offset, len(buf))
+                            break
+                return offset
         
-        elif field.type == 'struct':
-            # Nested structure
-            if field.name != '#':
-                self._deserialize_fields(f, field.fields, context, path + '.' + field.name + '.')
-            else:
-                self._deserialize_fields(f, field.fields, context, path + '.')
+        elif code == OP_STRUCT:
+            # Nested structure; '#' structs share their parent's dict
+            if key == '#':
+                return self._deserialize_fields(buf, offset, arg, context, target)
+            child = target.get(key) if key is not None else None
+            created = not isinstance(child, dict)
+            if created:
+                # Attach up front so expressions can see the fields read so far
+                child = {}
+                if key is None:
+                    target.append(child)
+                else:
+                    target[key] = child
+            try:
+                offset = self._deserialize_fields(buf, offset, arg, context, child)
+            finally:
+                if created and not child:
+                    # Nothing was read: leave no empty struct behind
+                    if key is None:
+                        target.pop()
+                    else:
+                        del target[key]
+            return offset
+        
+        elif code == OP_FIXED_STRUCT:
+            struct_op, record, layout = arg
+            if offset + record.size > len(buf) or (key is not None and isinstance(target.get(key), dict)):
+                # Truncated data or merging into an existing dict: read field by field
+                return self._deserialize_field(buf, offset, struct_op, context, target, key)
+            result = self._build_record(layout, iter(record.unpack_from(buf, offset)))
+            offset += record.size
                 
-        elif field.type == 'union':
-            first_key = next(iter(field.union_variants))
-            first_union_variant = field.union_variants[first_key]
-            discriminator_type = first_union_variant[0].get('type', 'uint8')
-            
-            if discriminator_type not in self.TYPE_MAP:
-                print("Warning: Unsupported discriminator type:", discriminator_type)
+        elif code == OP_UNION:
+            discriminator_type, discriminator_struct, variants = arg
+            if discriminator_struct is None:
                 raise BinaryFormatError(f"Unsupported discriminator type: {discriminator_type}")
-            discriminator_format = self.endian_char + self.TYPE_MAP[discriminator_type]
-            discriminator_size = struct.calcsize(discriminator_format)
-            discriminator_data = f.read(discriminator_size)
-            if len(discriminator_data) < discriminator_size:
-                print("Warning: Unexpected end of file while reading discriminator for union", field.name)
+            if offset + discriminator_struct.size > len(buf):
                 raise BinaryFormatError(f"Unexpected end of file reading discriminator for union {field.name}")
-            discriminator_value = struct.unpack(discriminator_format, discriminator_data)[0]
-            f.seek(-discriminator_size, io.SEEK_CUR)  # Rewind to read union variant
-            struct_fields = field.union_variants.get(str(discriminator_value), None)
-            if struct_fields is None:
-                print("Warning: No matching union variant found for discriminator value:", discriminator_value)
+            # Peek the discriminator in place; the variant reads it again as its first field,
+            # which costs one extra format code in the variant's fused scalar run
+            discriminator_value = discriminator_struct.unpack_from(buf, offset)[0]
+            variant = variants.get(discriminator_value)
+            if variant is None:
+                # Non-integer discriminators keep their string keys
+                variant = variants.get(str(discriminator_value))
+            if variant is None:
                 raise BinaryFormatError(f"Unknown union variant '{discriminator_value}' for field {field.name}")
-            
-            struct_field = self._parse_field_definition({
-                'name': field.name,
-                'type': 'struct',
-                'fields': struct_fields
-            })
-            if discriminator_value == 51:
-                pass
-            self._deserialize_field(f, struct_field, context, path)
+            return self._deserialize_field(buf, offset, variant[0], context, target, key)
             
         else:
-            print("Warning: Unsupported field type:", field.type)
             raise BinaryFormatError(f"Unsupported field type: {field.type}")
+        
+        if key is None:
+            target.append(result)
+        else:
+            target[key] = result
+        return offset
     
@@ -7,22 +7,23 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
+# Files are resolved against the script's directory, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(script_dir)
-    handler = BinaryFormatHandler('line_format.json')
-    map_line_data = handler.deserialize_from_binary('Config2.line1')
+    handler = BinaryFormatHandler(os.path.join(HERE, 'line_format.json'))
+    map_line_data = handler.deserialize_from_binary(os.path.join(HERE, 'Config2.line1'))
 
-    json_file = 'Config2.line1.json'
+    json_file = os.path.join(HERE, 'Config2.line1.json')
     with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(map_line_data, f, indent=2, ensure_ascii=False)
+        f.write(json.dumps(map_line_data, indent=2, ensure_ascii=False))
 
-    bin_file = 'Config2.line1.bin'
+    bin_file = os.path.join(HERE, 'Config2.line1.bin')
     handler.serialize_to_binary(map_line_data, bin_file)
     
     restored_data = handler.deserialize_from_binary(bin_file)
-    with open('restored_data.json', 'w', encoding='utf-8') as f:
-        json.dump(restored_data, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(HERE, 'restored_data.json'), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(restored_data, indent=2, ensure_ascii=False))
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,14 +7,15 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
+# Files are resolved against the script's directory, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(script_dir)
-    handler = BinaryFormatHandler('cn_map_geo_format.json')
-    map_geo = handler.deserialize_from_binary('mapfiles/64642.1')
-    output_file = 'mapfiles/64642.1.json'
+    handler = BinaryFormatHandler(os.path.join(HERE, 'cn_map_geo_format.json'))
+    map_geo = handler.deserialize_from_binary(os.path.join(HERE, 'mapfiles/64642.1'))
+    output_file = os.path.join(HERE, 'mapfiles/64642.1.json')
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(map_geo, f, indent=2, ensure_ascii=False)
+        f.write(json.dumps(map_geo, indent=2, ensure_ascii=False))
     print(f"Result saved to: {output_file}")
     
 
@@ -7,28 +7,29 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
+# Files are resolved against the script's directory, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(script_dir)
-    handler = BinaryFormatHandler('cn_map_index_format.json')
+    handler = BinaryFormatHandler(os.path.join(HERE, 'cn_map_index_format.json'))
 
     # deserialize
-    map_index = handler.deserialize_from_binary('mapfiles/150896641.0')
-    output_file = 'mapfiles/150896641.0.json'
+    map_index = handler.deserialize_from_binary(os.path.join(HERE, 'mapfiles/150896641.0'))
+    output_file = os.path.join(HERE, 'mapfiles/150896641.0.json')
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(map_index, f, indent=2, ensure_ascii=False)
+        f.write(json.dumps(map_index, indent=2, ensure_ascii=False))
     print(f"Result saved to: {output_file}")
 
  
     # Serialize
-    with open('map_index_test.json','r',encoding='utf-8') as f:
+    with open(os.path.join(HERE, 'map_index_test.json'),'r',encoding='utf-8') as f:
         test_data = json.load(f)
-    handler.serialize_to_binary(test_data, 'map_index_test.bin')
-    map_index_restored = handler.deserialize_from_binary('map_index_test.bin')
-    output_file_restored = 'map_index_test_restored.json'
+    handler.serialize_to_binary(test_data, os.path.join(HERE, 'map_index_test.bin'))
+    map_index_restored = handler.deserialize_from_binary(os.path.join(HERE, 'map_index_test.bin'))
+    output_file_restored = os.path.join(HERE, 'map_index_test_restored.json')
     with open(output_file_restored, 'w', encoding='utf-8') as f:
-        json.dump(map_index_restored, f, indent=2, ensure_ascii=False)
-    os.remove('map_index_test.bin')
+        f.write(json.dumps(map_index_restored, indent=2, ensure_ascii=False))
+    os.remove(os.path.join(HERE, 'map_index_test.bin'))
 
 if __name__ == "__main__":
     main()
@@ -10,7 +10,7 @@ These tests demonstrate the core functionality without
 over-complicating with full union implementations.
 """
 import pytest
-from binary_format_handler import BinaryFormatHandler
+from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
 
 def test_simple_array_with_length_field():
@@ -134,3 +134,71 @@ def test_length_field_with_context_reference():
     assert restored_data["data_count"] == 3
     assert len(restored_data["items"]) == 3
     assert restored_data["items"][1]["item_value"] == 200
+
+
+def test_array_of_unions_roundtrip():
+    """Test that an array of union elements serializes and deserializes per variant."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "count", "type": "uint8"},
+            {
+                "name": "points",
+                "type": "array",
+                "length_field": "context['count']",
+                "element_type": "union",
+                "discriminator_field": "kind",
+                "union_variants": {
+                    "1": [
+                        {"name": "kind", "type": "uint8"},
+                        {"name": "position", "type": "int32"}
+                    ],
+                    "2": [
+                        {"name": "kind", "type": "uint8"},
+                        {"name": "name", "type": "string", "size": 4, "encoding": "ascii"},
+                        {"name": "flags", "type": "uint16"}
+                    ]
+                }
+            }
+        ]
+    }
+    test_data = {
+        "count": 3,
+        "points": [
+            {"kind": 1, "position": -500},
+            {"kind": 2, "name": "AB", "flags": 7},
+            {"kind": 1, "position": 42}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    assert len(binary_data) == 1 + 5 + 7 + 5
+
+    restored_data = handler.deserialize_from_binary(binary_data)
+    assert restored_data == test_data
+
+
+def test_union_variant_keys_match_decoded_discriminator():
+    """Test that numeric variant keys match decoded discriminators next to non-numeric keys."""
+    format_def = {
+        "endianness": "big",
+        "fields": [
+            {"name": "kind", "type": "uint16"},
+            {
+                "name": "body",
+                "type": "union",
+                "discriminator_field": "kind",
+                "union_variants": {
+                    "7": [{"name": "kind", "type": "uint16"}, {"name": "value", "type": "int32"}],
+                    "x": [{"name": "kind", "type": "uint16"}]
+                }
+            }
+        ]
+    }
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary({"kind": 7, "body": {"kind": 7, "value": -1}})
+
+    assert handler.deserialize_from_binary(binary_data) == {"kind": 7, "body": {"kind": 7, "value": -1}}
+    with pytest.raises(BinaryFormatError, match="Unknown union variant '8'"):
+        handler.deserialize_from_binary(binary_data[:2] + b"\x00\x08" + binary_data[4:])
@@ -3,6 +3,7 @@ Test different input types for deserialize_from_binary method.
 """
 import pytest
 import json
+import mmap
 import tempfile
 import os
 from binary_format_handler import BinaryFormatHandler, BinaryFormatError
@@ -134,3 +135,60 @@ def test_round_trip_consistency():
     # Both should be equal to each other
     
 
+
+
+def test_deserialize_many_files():
+    """Test deserializing a list of files, with and without background reads."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "magic", "type": "uint32"},
+            {"name": "version", "type": "uint16"}
+        ]
+    }
+    handler = BinaryFormatHandler(format_def)
+    expected = [{"magic": 0x12345678, "version": i} for i in range(10)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i, data in enumerate(expected):
+            path = os.path.join(tmp_dir, f"record_{i}.bin")
+            with open(path, "wb") as f:
+                f.write(handler.serialize_to_binary(data))
+            paths.append(path)
+
+        assert handler.deserialize_many(paths, prefetch=3) == expected
+        assert handler.deserialize_many(paths[:2]) == expected[:2]
+
+        with pytest.raises(BinaryFormatError, match="Deserialization failed"):
+            handler.deserialize_many(paths + [os.path.join(tmp_dir, "missing.bin")])
+
+
+def test_deserialize_file_mapped_or_read(tmp_path, monkeypatch):
+    """Test that small files (read) and large files (mapped) decode the same way."""
+    format_def = {
+        "endianness": "big",
+        "fields": [
+            {"name": "count", "type": "uint32"},
+            {"name": "values", "type": "array", "length_field": "context['count']", "element_type": "uint16"}
+        ]
+    }
+    handler = BinaryFormatHandler(format_def)
+    test_data = {"count": 1000, "values": list(range(1000))}
+    file_path = tmp_path / "values.bin"
+    file_path.write_bytes(handler.serialize_to_binary(test_data))
+
+    # Record which kind of buffer each file was decoded from
+    mapped = []
+    deserialize_buffer = BinaryFormatHandler._deserialize_buffer
+
+    def spy(self, buf):
+        mapped.append(isinstance(buf, mmap.mmap))
+        return deserialize_buffer(self, buf)
+
+    monkeypatch.setattr(BinaryFormatHandler, "_deserialize_buffer", spy)
+
+    assert handler.deserialize_from_binary(str(file_path)) == test_data
+    monkeypatch.setattr(BinaryFormatHandler, "MMAP_MIN_SIZE", 0)
+    assert handler.deserialize_from_binary(str(file_path)) == test_data
+    assert mapped == [False, True]
@@ -0,0 +1,639 @@
+"""
+Edge case tests for BinaryFormatHandler.
+"""
+import array
+import io
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from binary_format_handler import BinaryFormatHandler, BinaryFormatError
+
+
+@pytest.mark.parametrize("endianness", ["little", "big"])
+@pytest.mark.parametrize("element_type, values", [
+    ("uint16", list(range(300))),
+    ("int32", [-i * 1000 for i in range(300)]),
+    ("float64", [i * 0.25 for i in range(300)]),
+])
+def test_large_primitive_array_roundtrip(endianness, element_type, values):
+    """Test that large primitive arrays roundtrip in both byte orders."""
+    format_def = {
+        "endianness": endianness,
+        "fields": [
+            {"name": "count", "type": "uint16"},
+            {
+                "name": "values",
+                "type": "array",
+                "length_field": "context['count']",
+                "element_type": element_type
+            }
+        ]
+    }
+    test_data = {"count": len(values), "values": values}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    restored_data = handler.deserialize_from_binary(binary_data)
+
+    assert restored_data == test_data
+
+
+@pytest.mark.parametrize("flag, expected", [
+    (1, {"flag": 1, "extra": 7}),
+    (0, {"flag": 0}),
+])
+def test_conditional_field_roundtrip(flag, expected):
+    """Test that a conditional field is only written and read when its condition holds."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "flag", "type": "uint8"},
+            {"name": "extra", "type": "uint16", "condition": "context['flag'] == 1"}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary({"flag": flag, "extra": 7})
+    restored_data = handler.deserialize_from_binary(binary_data)
+
+    assert restored_data == expected
+
+
+def test_condition_with_comment_and_line_break():
+    """Test that a valid condition carrying a comment or line break is inlined into readers correctly."""
+    format_def = {
+        "fields": [
+            {"name": "flag", "type": "uint8"},
+            {"name": "extra", "type": "uint16", "condition": "context['flag'] == 1  # only when flag"},
+            {"name": "more", "type": "uint8", "condition": "(context['flag']\n == 1)"}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary({"flag": 1, "extra": 7, "more": 2})
+
+    assert handler.deserialize_from_binary(binary_data) == {"flag": 1, "extra": 7, "more": 2}
+    assert handler.deserialize_from_binary(b"\x00") == {"flag": 0}
+
+
+def test_invalid_condition_rejected_at_init():
+    """Test that a malformed condition expression is reported when the format is loaded."""
+    format_def = {
+        "fields": [
+            {"name": "flag", "type": "uint8"},
+            {"name": "extra", "type": "uint16", "condition": "context['flag'] =="}
+        ]
+    }
+
+    with pytest.raises(BinaryFormatError, match="Invalid condition"):
+        BinaryFormatHandler(format_def)
+
+
+def test_uint8_array_from_bytes():
+    """Test that a uint8 array accepts bytes and bytearray with the same encoding as a list."""
+    format_def = {
+        "fields": [
+            {"name": "size", "type": "uint8"},
+            {"name": "payload", "type": "array", "length_field": "context['size']", "element_type": "uint8"},
+            {"name": "address", "type": "array", "size": 4, "element_type": "uint8"}
+        ]
+    }
+    listed = {"size": 5, "payload": list(b"Hello"), "address": [192, 168]}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(listed)
+
+    assert handler.serialize_to_binary({"size": 5, "payload": b"Hello", "address": bytearray([192, 168])}) == binary_data
+    assert handler.deserialize_from_binary(binary_data) == dict(listed, address=[192, 168, 0, 0])
+
+
+def test_primitive_struct_array_roundtrip():
+    """Test that arrays of all-primitive structs roundtrip as lists of dicts."""
+    format_def = {
+        "endianness": "big",
+        "fields": [
+            {"name": "count", "type": "uint16"},
+            {
+                "name": "items",
+                "type": "array",
+                "length_field": "context['count']",
+                "element_type": "struct",
+                "element_fields": [
+                    {"name": "id", "type": "uint32"},
+                    {"name": "value", "type": "float64"}
+                ]
+            }
+        ]
+    }
+    # Enough records for two full write batches and a remainder
+    test_data = {"count": 600, "items": [{"id": i, "value": i * 0.5} for i in range(600)]}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    assert len(binary_data) == 2 + 600 * 12
+    assert binary_data[2 + 300 * 12:2 + 301 * 12] == struct.pack(">Id", 300, 150.0)
+
+    restored_data = handler.deserialize_from_binary(binary_data)
+    assert restored_data == test_data
+
+    del test_data["items"][3]["value"]
+    with pytest.raises(BinaryFormatError, match="Missing field in data: value"):
+        handler.serialize_to_binary(test_data)
+
+
+def test_truncated_scalar_run_reports_field():
+    """Test that a buffer ending inside adjacent scalar fields names the missing field."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "header", "type": "struct", "fields": [
+                {"name": "magic", "type": "uint32"},
+                {"name": "version", "type": "uint16"},
+                {"name": "flags", "type": "uint16"}
+            ]}
+        ]
+    }
+    test_data = {"header": {"magic": 0xCAFEBABE, "version": 2, "flags": 5}}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    assert handler.deserialize_from_binary(binary_data) == test_data
+
+    with pytest.raises(BinaryFormatError, match="reading flags"):
+        handler.deserialize_from_binary(binary_data[:-1])
+
+
+def test_scalars_around_fixed_struct_read_as_one_group():
+    """Test that scalars and a primitive struct read together keep field order and errors."""
+    format_def = {
+        "endianness": "big",
+        "fields": [
+            {"name": "magic", "type": "uint16"},
+            {"name": "origin", "type": "struct", "fields": [
+                {"name": "x", "type": "int32"},
+                {"name": "y", "type": "int32"}
+            ]},
+            {"name": "scale", "type": "float32"},
+            {"name": "flags", "type": "uint8"},
+            {"name": "label", "type": "string"}
+        ]
+    }
+    test_data = {"magic": 0xBEEF, "origin": {"x": -7, "y": 9}, "scale": 0.5, "flags": 3, "label": "a"}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    result = handler.deserialize_from_binary(binary_data)
+    assert result == test_data
+    assert list(result) == ["magic", "origin", "scale", "flags", "label"]
+
+    with pytest.raises(BinaryFormatError, match="reading y"):
+        handler.deserialize_from_binary(binary_data[:8])
+
+
+def test_fully_fixed_format_roundtrip():
+    """Test a format of only primitives and primitive structs, including short and long buffers."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "id", "type": "uint32"},
+            {"name": "pos", "type": "struct", "fields": [
+                {"name": "lat", "type": "float64"},
+                {"name": "lon", "type": "float64"},
+                {"name": "alt", "type": "struct", "fields": [{"name": "meters", "type": "int16"}]}
+            ]},
+            {"name": "status", "type": "uint8"}
+        ]
+    }
+    test_data = {"id": 42, "pos": {"lat": 31.25, "lon": 121.5, "alt": {"meters": -3}}, "status": 1}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    assert len(binary_data) == 4 + 8 + 8 + 2 + 1
+    assert handler.deserialize_from_binary(binary_data) == test_data
+    # Trailing bytes are ignored, as with any other format
+    assert handler.deserialize_from_binary(binary_data + b"\x00") == test_data
+
+    with pytest.raises(BinaryFormatError, match="reading status"):
+        handler.deserialize_from_binary(binary_data[:-1])
+    del test_data["pos"]["alt"]["meters"]
+    with pytest.raises(BinaryFormatError, match="Missing field in data: meters"):
+        handler.serialize_to_binary(test_data)
+    test_data["pos"]["alt"] = [-3]
+    with pytest.raises(BinaryFormatError, match="Expected dict for struct field alt"):
+        handler.serialize_to_binary(test_data)
+
+
+def test_string_with_non_utf8_encoding_roundtrip():
+    """Test that strings in a codec without a native fast path roundtrip."""
+    format_def = {
+        "fields": [
+            {"name": "fixed", "type": "string", "size": 8, "encoding": "gb18030"},
+            {"name": "variable", "type": "string", "encoding": "gb18030"}
+        ]
+    }
+    test_data = {"fixed": "北京", "variable": "上海虹桥站"}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+
+    assert binary_data[:8] == "北京".encode("gb18030").ljust(8, b"\x00")
+    assert handler.deserialize_from_binary(binary_data) == test_data
+
+
+def test_unknown_encoding_rejected_at_init():
+    """Test that an unknown string encoding is reported when the format is loaded."""
+    format_def = {"fields": [{"name": "text", "type": "string", "size": 4, "encoding": "no-such-codec"}]}
+
+    with pytest.raises(BinaryFormatError, match="Invalid encoding"):
+        BinaryFormatHandler(format_def)
+
+
+def test_fixed_string_strips_only_trailing_padding():
+    """Test that fixed-size strings drop trailing NUL padding but keep embedded NULs."""
+    format_def = {"fields": [{"name": "text", "type": "string", "size": 8}]}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary({"text": "ab\x00cd"})
+
+    assert binary_data == b"ab\x00cd\x00\x00\x00"
+    assert handler.deserialize_from_binary(binary_data) == {"text": "ab\x00cd"}
+
+
+def test_validate_flag_controls_container_checks():
+    """Test that validate=False skips the list/dict checks but produces identical output."""
+    format_def = {
+        "fields": [
+            {"name": "values", "type": "array", "size": 3, "element_type": "uint8"},
+            {"name": "point", "type": "struct", "fields": [
+                {"name": "x", "type": "int16"},
+                {"name": "y", "type": "int16"}
+            ]}
+        ]
+    }
+    test_data = {"values": [1, 2, 3], "point": {"x": -1, "y": 1}}
+    tuple_data = {"values": (1, 2, 3), "point": {"x": -1, "y": 1}}
+
+    checked = BinaryFormatHandler(format_def)
+    unchecked = BinaryFormatHandler(format_def, validate=False)
+
+    assert unchecked.serialize_to_binary(test_data) == checked.serialize_to_binary(test_data)
+    assert unchecked.serialize_to_binary(tuple_data) == checked.serialize_to_binary(test_data)
+    with pytest.raises(BinaryFormatError, match="Expected list"):
+        checked.serialize_to_binary(tuple_data)
+
+
+def test_repeated_serialize_does_not_accumulate_calculated_fields():
+    """Test that reusing a handler leaves exactly one pending calculated field per call."""
+    format_def = {
+        "fields": [
+            {"name": "value", "type": "uint32"},
+            {"name": "crc", "type": "uint32", "function": "crc32"}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    first = handler.serialize_to_binary({"value": 1, "crc": 0})
+    for _ in range(3):
+        assert handler.serialize_to_binary({"value": 1, "crc": 0}) == first
+    assert len(handler.calculated_fields) == 1
+
+
+def test_generated_reader_matches_interpreter():
+    """Test that the generated reader gives the interpreter's result or error at every length."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "header", "type": "struct", "fields": [
+                {"name": "magic", "type": "uint32"},
+                {"name": "version", "type": "uint16"},
+                {"name": "offset", "type": "int24"},
+                {"name": "label", "type": "string", "size": 6}
+            ]},
+            {"name": "rgb", "type": "array", "size": 3, "element_type": "uint8"},
+            {"name": "flag", "type": "uint8"},
+            {"name": "extra", "type": "uint16", "condition": "context['flag'] == 1"},
+            {"name": "note", "type": "string"},
+            {"name": "count", "type": "uint8"},
+            {"name": "values", "type": "array", "length_field": "context['count']", "element_type": "int16"}
+        ]
+    }
+    test_data = {
+        "header": {"magic": 7, "version": 2, "offset": 1000, "label": "abc"},
+        "rgb": [1, 2, 3], "flag": 1, "extra": 9, "note": "hello", "count": 3, "values": [-1, 0, 1]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+
+    def interpret(buf):
+        result = {}
+        handler._deserialize_fields(buf, 0, handler._read_program, result, result)
+        return result
+
+    def outcome(read, buf):
+        try:
+            return read(buf)
+        except BinaryFormatError as e:
+            return str(e)
+
+    assert handler._reader(binary_data) == test_data
+    for end in range(len(binary_data)):
+        truncated = binary_data[:end]
+        assert outcome(handler._reader, truncated) == outcome(interpret, truncated)
+
+
+def test_read_to_end_array_has_no_leading_placeholder():
+    """Test that a size -1 array reads elements from the start until the data runs out."""
+    format_def = {
+        "fields": [
+            {"name": "count", "type": "uint8"},
+            {
+                "name": "points",
+                "type": "array",
+                "size": -1,
+                "element_type": "struct",
+                "element_fields": [
+                    {"name": "delta", "type": "int24"},
+                    {"name": "flag", "type": "uint8"}
+                ]
+            }
+        ]
+    }
+    test_data = {"count": 3, "points": [{"delta": i, "flag": i % 2} for i in range(3)]}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+
+    assert handler.deserialize_from_binary(binary_data) == test_data
+    # A trailing partial element keeps the fields that could be read
+    restored = handler.deserialize_from_binary(binary_data + b"\x07\x00\x00")
+    assert restored["points"] == test_data["points"] + [{"delta": 7}]
+
+
+@pytest.mark.parametrize("count", [0, 3, 300])
+def test_read_to_end_primitive_array(count):
+    """Test that a size -1 array of primitives reads every whole element left in the data."""
+    format_def = {
+        "endianness": "big",
+        "fields": [
+            {"name": "count", "type": "uint8"},
+            {"name": "values", "type": "array", "size": -1, "element_type": "uint16"}
+        ]
+    }
+    test_data = {"count": count % 256, "values": list(range(count))}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+
+    assert len(binary_data) == 1 + 2 * count
+    assert handler.deserialize_from_binary(binary_data) == test_data
+    # A trailing partial element is left unread
+    assert handler.deserialize_from_binary(binary_data + b"\x07") == test_data
+
+
+def test_nested_fixed_struct_roundtrip():
+    """Test that structs nesting only primitives roundtrip alone and as array elements."""
+    point = [{"name": "x", "type": "int16"}, {"name": "y", "type": "int16"}]
+    format_def = {
+        "endianness": "big",
+        "fields": [
+            {"name": "box", "type": "struct", "fields": [
+                {"name": "min", "type": "struct", "fields": point},
+                {"name": "max", "type": "struct", "fields": point},
+                {"name": "layer", "type": "uint8"}
+            ]},
+            {"name": "count", "type": "uint8"},
+            {
+                "name": "segments",
+                "type": "array",
+                "length_field": "context['count']",
+                "element_type": "struct",
+                "element_fields": [
+                    {"name": "start", "type": "struct", "fields": point},
+                    {"name": "end", "type": "struct", "fields": point}
+                ]
+            }
+        ]
+    }
+    test_data = {
+        "box": {"min": {"x": -5, "y": -6}, "max": {"x": 5, "y": 6}, "layer": 3},
+        "count": 2,
+        "segments": [
+            {"start": {"x": 0, "y": 0}, "end": {"x": 1, "y": 2}},
+            {"start": {"x": 3, "y": 4}, "end": {"x": -1, "y": -2}}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+
+    assert len(binary_data) == 9 + 1 + 2 * 8
+    assert handler.deserialize_from_binary(binary_data) == test_data
+    with pytest.raises(BinaryFormatError, match="reading y"):
+        handler.deserialize_from_binary(binary_data[:7])
+
+    del test_data["box"]["max"]["y"]
+    with pytest.raises(BinaryFormatError, match="Missing field in data: y"):
+        handler.serialize_to_binary(test_data)
+
+
+@pytest.mark.parametrize("condition", [
+    "__import__('os').system('true')",
+    "context.__class__",
+    "[x for x in context]",
+    "context.clear() or True",
+    "'{0.__class__}'.format(context)",
+    "9**9**9",
+    "'a'*99999999999 == ''",
+    "(1<<99999999999) > 0",
+    "[0]*(99999999999+1)",
+])
+def test_unsafe_condition_rejected_at_init(condition):
+    """Test that conditions outside the expression whitelist are rejected when the format is loaded."""
+    format_def = {"fields": [{"name": "extra", "type": "uint8", "condition": condition}]}
+
+    with pytest.raises(BinaryFormatError, match="Invalid condition"):
+        BinaryFormatHandler(format_def)
+
+
+def test_struct_array_with_conditions_and_strings():
+    """Test arrays of variable-layout structs, including errors inside a later element."""
+    format_def = {
+        "fields": [
+            {"name": "flag", "type": "uint8"},
+            {"name": "count", "type": "uint8"},
+            {
+                "name": "items",
+                "type": "array",
+                "length_field": "context['count']",
+                "element_type": "struct",
+                "element_fields": [
+                    {"name": "id", "type": "uint8"},
+                    {"name": "label", "type": "string"},
+                    {"name": "extra", "type": "uint16", "condition": "context['flag'] == 1"}
+                ]
+            }
+        ]
+    }
+    items = [{"id": 1, "label": "one", "extra": 10}, {"id": 2, "label": "two", "extra": 20}]
+
+    handler = BinaryFormatHandler(format_def)
+    with_extra = handler.serialize_to_binary({"flag": 1, "count": 2, "items": items})
+    without_extra = handler.serialize_to_binary({"flag": 0, "count": 2, "items": items})
+
+    assert handler.deserialize_from_binary(with_extra) == {"flag": 1, "count": 2, "items": items}
+    assert handler.deserialize_from_binary(without_extra) == {
+        "flag": 0, "count": 2, "items": [{"id": 1, "label": "one"}, {"id": 2, "label": "two"}]
+    }
+    with pytest.raises(BinaryFormatError, match="reading label"):
+        handler.deserialize_from_binary(with_extra[:-4])
+
+
+def test_deserialize_from_bytes_like_inputs():
+    """Test that memoryviews, slices of larger buffers and other buffer objects are accepted."""
+    format_def = {
+        "fields": [
+            {"name": "id", "type": "uint16"},
+            {"name": "label", "type": "string", "size": 4}
+        ]
+    }
+    test_data = {"id": 513, "label": "ab"}
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary(test_data)
+    framed = memoryview(b"\xff" + binary_data + b"\xff")
+
+    assert handler.deserialize_from_binary(memoryview(binary_data)) == test_data
+    assert handler.deserialize_from_binary(framed[1:-1]) == test_data
+    assert handler.deserialize_from_binary(array.array("B", binary_data)) == test_data
+    with pytest.raises(BinaryFormatError, match="Unsupported input_source type"):
+        handler.deserialize_from_binary(42)
+
+
+def test_deserialize_from_stream():
+    """Test that binary streams are read from their current position."""
+    format_def = {"fields": [{"name": "id", "type": "uint16"}, {"name": "label", "type": "string"}]}
+    test_data = {"id": 7, "label": "stream"}
+
+    handler = BinaryFormatHandler(format_def)
+    stream = io.BytesIO(b"HDR" + handler.serialize_to_binary(test_data))
+    stream.read(3)
+
+    assert handler.deserialize_from_binary(stream) == test_data
+
+
+def test_int24_array_matches_scalar_encoding():
+    """Test that int24 arrays are encoded exactly like the same number of int24 scalars."""
+    values = [0, 1, 4660, 8388607, 65535]
+    array_format = {
+        "endianness": "little",
+        "fields": [{"name": "values", "type": "array", "size": 5, "element_type": "int24"}]
+    }
+    scalar_format = {
+        "endianness": "little",
+        "fields": [{"name": f"v{i}", "type": "int24"} for i in range(5)]
+    }
+
+    array_handler = BinaryFormatHandler(array_format)
+    scalar_handler = BinaryFormatHandler(scalar_format)
+    binary_data = array_handler.serialize_to_binary({"values": values})
+
+    assert binary_data == scalar_handler.serialize_to_binary({f"v{i}": v for i, v in enumerate(values)})
+    assert array_handler.deserialize_from_binary(binary_data) == {"values": values}
+    # A longer array read first must not leave stale bytes behind for the next one
+    counted_handler = BinaryFormatHandler({
+        "endianness": "little",
+        "fields": [
+            {"name": "count", "type": "uint8"},
+            {"name": "values", "type": "array", "length_field": "context['count']", "element_type": "int24"}
+        ]
+    })
+    for data in ({"count": 8, "values": [8388607] * 8}, {"count": 5, "values": values}):
+        assert counted_handler.deserialize_from_binary(counted_handler.serialize_to_binary(data)) == data
+    with pytest.raises(BinaryFormatError, match="Value out of range for int24: 9000000"):
+        array_handler.serialize_to_binary({"values": [1, 9000000]})
+
+
+def test_int24_array_reads_on_shared_handler_across_threads():
+    """Test that concurrent int24 array reads on one handler never see each other's data."""
+    handler = BinaryFormatHandler({
+        "endianness": "little",
+        "fields": [
+            {"name": "count", "type": "uint16"},
+            {"name": "values", "type": "array", "length_field": "context['count']", "element_type": "int24"}
+        ]
+    })
+    records = [{"count": 50 + 40 * i, "values": [i * 1000 + j for j in range(50 + 40 * i)]} for i in range(16)]
+    blobs = [handler.serialize_to_binary(record) for record in records]
+
+    def check(i):
+        return all(handler.deserialize_from_binary(blobs[i]) == records[i] for _ in range(200))
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            assert all(pool.map(check, range(16)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+
+def test_columnar_struct_array_roundtrip():
+    """Test that a columnar array keeps one list per element field and the row-wise encoding."""
+    element_fields = [{"name": "id", "type": "uint32"}, {"name": "value", "type": "float64"}]
+    rows_format = {
+        "fields": [
+            {"name": "count", "type": "uint16"},
+            {"name": "items", "type": "array", "length_field": "context['count']",
+             "element_type": "struct", "element_fields": element_fields}
+        ]
+    }
+    columns_format = {
+        "fields": [
+            {"name": "count", "type": "uint16"},
+            {"name": "items", "type": "array", "length_field": "context['count']", "columnar": True,
+             "element_type": "struct", "element_fields": element_fields}
+        ]
+    }
+    # More rows than one packing batch
+    rows = {"count": 300, "items": [{"id": i, "value": i * 0.5} for i in range(300)]}
+    columns = {"count": 300, "items": {"id": list(range(300)), "value": [i * 0.5 for i in range(300)]}}
+
+    handler = BinaryFormatHandler(columns_format)
+    binary_data = handler.serialize_to_binary(columns)
+
+    assert binary_data == BinaryFormatHandler(rows_format).serialize_to_binary(rows)
+    assert handler.deserialize_from_binary(binary_data) == columns
+    with pytest.raises(BinaryFormatError, match="Column value"):
+        handler.serialize_to_binary({"count": 3, "items": {"id": [0, 1, 2], "value": [0.0]}})
+
+    columns_format["fields"][1]["element_fields"] = [{"name": "label", "type": "string"}]
+    with pytest.raises(BinaryFormatError, match="Columnar array field items"):
+        BinaryFormatHandler(columns_format)
+
+
+def test_struct_array_element_errors():
+    """Test that bad struct array elements report the same errors as top-level fields."""
+    format_def = {
+        "fields": [
+            {
+                "name": "points",
+                "type": "array",
+                "size": 2,
+                "element_type": "struct",
+                "element_fields": [
+                    {"name": "delta", "type": "int24"},
+                    {"name": "name", "type": "string", "size": 4}
+                ]
+            }
+        ]
+    }
+    handler = BinaryFormatHandler(format_def)
+
+    with pytest.raises(BinaryFormatError, match="Missing field in data: name"):
+        handler.serialize_to_binary({"points": [{"delta": 1, "name": "a"}, {"delta": 2}]})
+    with pytest.raises(BinaryFormatError, match="Value out of range for int24: 9000000"):
+        handler.serialize_to_binary({"points": [{"delta": 9000000, "name": "a"}, {"delta": 2, "name": "b"}]})
+    with pytest.raises(BinaryFormatError, match="Expected dict for struct field #"):
+        handler.serialize_to_binary({"points": [{"delta": 1, "name": "a"}, 5]})
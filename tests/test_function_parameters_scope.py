@@ -1,21 +1,16 @@
 #!/usr/bin/env python3
-import os
-import sys
 import struct
 import crcmod
 import pytest
+from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
-# Ensure the project root is on sys.path to import the module when running pytest from repo root
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, PROJECT_ROOT)
 
-from binary_format_handler import BinaryFormatHandler, BinaryFormatError
+CRC32_DEFAULT = crcmod.mkCrcFun(0x104C11DB7, initCrc=0xFFFFFFFF, rev=True, xorOut=0xFFFFFFFF)
 
 
 def crc32_default(data: bytes) -> int:
     """Helper to compute CRC32 matching the handler's defaults."""
-    crc_func = crcmod.mkCrcFun(0x104C11DB7, initCrc=0xFFFFFFFF, rev=True, xorOut=0xFFFFFFFF)
-    return crc_func(data)
+    return CRC32_DEFAULT(data)
 
 
 def test_crc32_scope_in_parameters_all_previous():
@@ -119,3 +114,109 @@ def test_parameters_override_top_level_scope():
     expected_crc = crc32_default(payload)
     actual_crc, = struct.unpack('<I', blob[-4:])
     assert actual_crc == expected_crc
+
+
+@pytest.mark.parametrize("function, params", [
+    ("crc32", {}),
+    ("crc32", {"initial_value": 0}),
+    ("crc32", {"initial_value": 0x12345678}),
+    ("crc32", {"polynomial": 0x11EDC6F41}),
+    ("crc16", {}),
+    ("crc16", {"polynomial": 0x11021, "initial_value": 0x1D0F, "reverse": False}),
+    ("crc16", {"polynomial": 0x11021, "initial_value": 0xFFFF, "reverse": False, "xor_out": 0xFFFF}),
+])
+def test_crc_matches_crcmod(function, params):
+    """Every CRC parameter set, whichever backend computes it, must match crcmod."""
+    width = 4 if function == "crc32" else 2
+    fmt = {
+        "endianness": "little",
+        "fields": [
+            {"name": "payload", "type": "array", "size": 64, "element_type": "uint8"},
+            {
+                "name": "crc",
+                "type": "uint32" if width == 4 else "uint16",
+                "function": function,
+                "function_parameters": params,
+            },
+        ],
+    }
+    handler = BinaryFormatHandler(fmt)
+    blob = handler.serialize_to_binary({"payload": list(range(64)), "crc": 0})
+
+    defaults = {
+        "crc32": dict(polynomial=0x104C11DB7, initial_value=0xFFFFFFFF, reverse=True, xor_out=0xFFFFFFFF),
+        "crc16": dict(polynomial=0x18005, initial_value=0xFFFF, reverse=True, xor_out=0x0000),
+    }[function]
+    defaults.update(params)
+    crc_func = crcmod.mkCrcFun(defaults["polynomial"], initCrc=defaults["initial_value"],
+                               rev=defaults["reverse"], xorOut=defaults["xor_out"])
+    assert int.from_bytes(blob[-width:], "little") == crc_func(blob[:-width])
+
+
+def test_checksums_sharing_a_scope():
+    """Test that two checksums over the same field range are both calculated."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "a", "type": "uint32"},
+            {"name": "b", "type": "uint32"},
+            {"name": "crc32", "type": "uint32", "function": "crc32",
+             "function_parameters": {"scope": "field_range", "scope_start": "a", "scope_end": "b"}},
+            {"name": "crc16", "type": "uint16", "function": "crc16",
+             "function_parameters": {"scope": "field_range", "scope_start": "a", "scope_end": "b"}}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary({"a": 1, "b": 2, "crc32": 0, "crc16": 0})
+
+    payload = binary_data[:8]
+    crc16 = crcmod.mkCrcFun(0x18005, initCrc=0xFFFF, rev=True, xorOut=0x0000)
+    assert binary_data[8:12] == struct.pack("<I", crc32_default(payload))
+    assert binary_data[12:14] == struct.pack("<H", crc16(payload))
+
+
+@pytest.mark.parametrize("function", ["crc32", "crc16"])
+def test_trailing_crc_matches_two_phase_path(function):
+    """Test that a lone trailing CRC gives the same bytes as a CRC followed by more fields."""
+    head = [
+        {"name": "magic", "type": "uint32"},
+        {"name": "name", "type": "string"},
+        {"name": "values", "type": "array", "size": 3, "element_type": "int16"}
+    ]
+    crc_type = "uint32" if function == "crc32" else "uint16"
+    crc_field = {"name": "crc", "type": crc_type, "function": function}
+    trailing = BinaryFormatHandler({"endianness": "big", "fields": head + [crc_field]})
+    followed = BinaryFormatHandler({"endianness": "big", "fields": head + [crc_field, {"name": "end", "type": "uint8"}]})
+    data = {"magic": 0xA1B2C3D4, "name": "abc", "values": [1, -2, 3], "crc": 0}
+
+    binary_data = trailing.serialize_to_binary(data)
+    assert binary_data == followed.serialize_to_binary(dict(data, end=9))[:-1]
+    assert len(trailing.calculated_fields) == 1
+
+    del data["crc"]
+    with pytest.raises(BinaryFormatError, match="Missing field in data: crc"):
+        trailing.serialize_to_binary(data)
+
+
+def test_successive_all_previous_crcs():
+    """Test that each all_previous CRC covers every byte before it, earlier CRCs still zero."""
+    format_def = {
+        "endianness": "little",
+        "fields": [
+            {"name": "a", "type": "uint32"},
+            {"name": "crc_a", "type": "uint32", "function": "crc32"},
+            {"name": "b", "type": "string"},
+            {"name": "crc16", "type": "uint16", "function": "crc16"},
+            {"name": "crc_b", "type": "uint32", "function": "crc32"}
+        ]
+    }
+
+    handler = BinaryFormatHandler(format_def)
+    binary_data = handler.serialize_to_binary({"a": 1, "crc_a": 0, "b": "hello", "crc16": 0, "crc_b": 0})
+
+    crc16 = crcmod.mkCrcFun(0x18005, initCrc=0xFFFF, rev=True, xorOut=0x0000)
+    zeroed = binary_data[:4] + bytes(4) + binary_data[8:17]
+    assert binary_data[4:8] == struct.pack("<I", crc32_default(binary_data[:4]))
+    assert binary_data[17:19] == struct.pack("<H", crc16(zeroed))
+    assert binary_data[19:23] == struct.pack("<I", crc32_default(zeroed + bytes(2)))
@@ -3,26 +3,24 @@
 
 import pytest
 import json
-import tempfile
-import os
 from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
 
 class TestBinaryFormatHandlerInit:
     """Test the different ways to initialize BinaryFormatHandler."""
     
-    def setup_method(self):
-        """Set up test data."""
-        self.sample_format = {
-            "endianness": "little",
-            "description": "Test format",
-            "fields": [
-                {"name": "magic", "type": "uint32"},
-                {"name": "version", "type": "uint16"},
-                {"name": "name", "type": "string", "size": 32}
-            ]
-        }
-        
+    # Shared by every test; the handler must not modify the format it is given
+    sample_format = {
+        "endianness": "little",
+        "description": "Test format",
+        "fields": [
+            {"name": "magic", "type": "uint32"},
+            {"name": "version", "type": "uint16"},
+            {"name": "name", "type": "string", "size": 32}
+        ]
+    }
+    sample_json = json.dumps(sample_format)
+    
     def test_init_with_dict(self):
         """Test initialization with a dictionary."""
         handler = BinaryFormatHandler(self.sample_format)
@@ -32,23 +30,18 @@ class TestBinaryFormatHandlerInit:
         
     def test_init_with_json_string(self):
         """Test initialization with a JSON string."""
-        json_string = json.dumps(self.sample_format)
-        handler = BinaryFormatHandler(json_string)
+        handler = BinaryFormatHandler(self.sample_json)
         assert handler.format_json_dict == self.sample_format
         assert handler.endianness == "little"
         
-    def test_init_with_file_path(self):
+    def test_init_with_file_path(self, tmp_path):
         """Test initialization with a file path."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(self.sample_format, f)
-            temp_file = f.name
-            
-        try:
-            handler = BinaryFormatHandler(temp_file)
-            assert handler.format_json_dict == self.sample_format
-            assert handler.endianness == "little"
-        finally:
-            os.unlink(temp_file)
+        temp_file = tmp_path / "format.json"
+        temp_file.write_text(self.sample_json)
+        
+        handler = BinaryFormatHandler(str(temp_file))
+        assert handler.format_json_dict == self.sample_format
+        assert handler.endianness == "little"
             
     def test_init_with_invalid_json_string(self):
         """Test initialization with invalid JSON string."""
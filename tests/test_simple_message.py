@@ -2,12 +2,11 @@
 """Test simple message format functionality."""
 
 import os
-import tempfile
 import pytest
 from binary_format_handler import BinaryFormatHandler, BinaryFormatError
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def message_format():
     """Simple message format definition."""
     return {
@@ -65,6 +64,12 @@ def message_format():
     }
 
 
+@pytest.fixture(scope="module")
+def handler(message_format):
+    """Handler built once and shared by the tests in this module."""
+    return BinaryFormatHandler(message_format)
+
+
 @pytest.fixture
 def sample_message_data():
     """Sample message data for testing."""
@@ -84,11 +89,8 @@ def sample_message_data():
 class TestSimpleMessage:
     """Test simple message format serialization and deserialization."""
     
-    def test_message_roundtrip_with_dict(self, message_format, sample_message_data):
+    def test_message_roundtrip_with_dict(self, handler, sample_message_data):
         """Test serialization and deserialization using format dict."""
-        # Create handler with format dictionary
-        handler = BinaryFormatHandler(message_format)
-        
         # Serialize to bytes
         binary_data = handler.serialize_to_binary(sample_message_data)
         assert isinstance(binary_data, bytes)
@@ -100,36 +102,24 @@ class TestSimpleMessage:
         # Verify data integrity
         assert restored_data == sample_message_data
     
-    def test_message_roundtrip_with_file(self, message_format, sample_message_data):
+    def test_message_roundtrip_with_file(self, handler, sample_message_data, tmp_path):
         """Test serialization and deserialization using temporary files."""
-        # Create handler with format dictionary
-        handler = BinaryFormatHandler(message_format)
+        output_file = str(tmp_path / "message.bin")
+        
+        # Serialize to file
+        handler.serialize_to_binary(sample_message_data, output_file)
+        
+        # Verify file was created and has content (stat raises if it is missing)
+        assert os.stat(output_file).st_size > 0
         
-        with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as tmp_file:
-            output_file = tmp_file.name
+        # Deserialize from file
+        restored_data = handler.deserialize_from_binary(output_file)
         
-        try:
-            # Serialize to file
-            handler.serialize_to_binary(sample_message_data, output_file)
-            
-            # Verify file was created and has content
-            assert os.path.exists(output_file)
-            assert os.path.getsize(output_file) > 0
-            
-            # Deserialize from file
-            restored_data = handler.deserialize_from_binary(output_file)
-            
-            # Verify data integrity
-            assert restored_data == sample_message_data
-            
-        finally:
-            # Clean up
-            if os.path.exists(output_file):
-                os.unlink(output_file)
+        # Verify data integrity
+        assert restored_data == sample_message_data
     
-    def test_message_serialization_size(self, message_format, sample_message_data):
+    def test_message_serialization_size(self, handler, sample_message_data):
         """Test that serialized message has expected size."""
-        handler = BinaryFormatHandler(message_format)
         binary_data = handler.serialize_to_binary(sample_message_data)
         
         # Expected size calculation:
@@ -144,9 +134,8 @@ class TestSimpleMessage:
         expected_size = 89
         assert len(binary_data) == expected_size
     
-    def test_header_fields(self, message_format, sample_message_data):
+    def test_header_fields(self, handler, sample_message_data):
         """Test that header fields are correctly serialized/deserialized."""
-        handler = BinaryFormatHandler(message_format)
         binary_data = handler.serialize_to_binary(sample_message_data)
         restored_data = handler.deserialize_from_binary(binary_data)
         
@@ -156,33 +145,28 @@ class TestSimpleMessage:
         assert restored_data["header"]["message_type"] == 100
         assert restored_data["header"]["payload_size"] == 5
     
-    def test_variable_length_data(self, message_format):
-        """Test with different payload sizes."""
-        handler = BinaryFormatHandler(message_format)
+    @pytest.mark.parametrize("test_data", [
+        b"H",  # 1 byte
+        b"He",  # 2 bytes
+        b"Hello World",  # 11 bytes
+    ])
+    def test_variable_length_data(self, handler, test_data):
+        """Test with different payload sizes, given as bytes (decoded back as lists)."""
+        message_data = {
+            "header": {
+                "magic": 0x4D534720,
+                "version": 1,
+                "message_type": 100,
+                "payload_size": len(test_data)
+            },
+            "sender": "test@example.com",
+            "timestamp": 1672531200,
+            "data": test_data
+        }
         
-        # Test with different data lengths
-        test_cases = [
-            [72],  # 1 byte
-            [72, 101],  # 2 bytes
-            [72, 101, 108, 108, 111, 32, 87, 111, 114, 108, 100],  # 11 bytes
-        ]
+        binary_data = handler.serialize_to_binary(message_data)
+        restored_data = handler.deserialize_from_binary(binary_data)
         
-        for test_data in test_cases:
-            message_data = {
-                "header": {
-                    "magic": 0x4D534720,
-                    "version": 1,
-                    "message_type": 100,
-                    "payload_size": len(test_data)
-                },
-                "sender": "test@example.com",
-                "timestamp": 1672531200,
-                "data": test_data
-            }
-            
-            binary_data = handler.serialize_to_binary(message_data)
-            restored_data = handler.deserialize_from_binary(binary_data)
-            
-            assert restored_data == message_data
-            assert restored_data["data"] == test_data
-            assert len(restored_data["data"]) == len(test_data)
+        assert restored_data == dict(message_data, data=list(test_data))
+        assert restored_data["data"] == list(test_data)
+        assert len(restored_data["data"]) == len(test_data)